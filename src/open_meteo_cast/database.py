@@ -1,7 +1,11 @@
 import sqlite3
+import atexit
+import threading
 import logging
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from itertools import repeat
 from datetime import datetime, timedelta
 from typing import Union, Optional
 
@@ -9,13 +13,72 @@ from typing import Union, Optional
 DB_PATH = Path(__file__).parent.parent.parent / "data" / "forecasts.db"
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# Insert statements, kept as constants so sqlite3's statement cache can reuse them
+_INSERT_RUN = """
+    INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_INSERT_RAW = """
+    INSERT INTO raw_forecast_data (latitude, longitude, model_name, run_timestamp, member, variable, forecast_timestamp, value)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_STATS = """
+    INSERT INTO statistical_forecasts (latitude, longitude, model_name, run_timestamp, variable, statistic, forecast_timestamp, value)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# One connection per thread, reused by every model and the ensemble during a run.
+# Connections are keyed by thread id and only ever used by their own thread; they are
+# opened with check_same_thread=False solely so close_db_connection can close them all.
+# Worker threads release theirs with close_thread_db_connection when their task ends.
+_connections: dict[int, tuple[str, sqlite3.Connection]] = {}
+_connections_lock = threading.Lock()
+
 def get_db_connection() -> sqlite3.Connection:
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DB_PATH)
+    """Returns the calling thread's connection to the SQLite database, opening it on first use."""
+    thread_id = threading.get_ident()
+    with _connections_lock:
+        entry = _connections.get(thread_id)
+    if entry is not None and entry[0] == str(DB_PATH):
+        return entry[1]
+
+    if entry is not None:
+        entry[1].close()
+    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)  # Wait for concurrent writers instead of failing
     conn.execute("PRAGMA foreign_keys = ON;")  # Enforce foreign key constraints
+    conn.execute("PRAGMA temp_store = MEMORY;")  # Keep temporary tables and indices used by bulk inserts in memory
+    conn.execute("PRAGMA journal_mode = WAL;")  # Readers don't block the writer
+    conn.execute("PRAGMA synchronous = NORMAL;")  # Safe with WAL, avoids an fsync per commit
+    conn.execute("PRAGMA cache_size = -65536;")  # 64 MiB page cache
     conn.row_factory = sqlite3.Row
+    with _connections_lock:
+        _connections[thread_id] = (str(DB_PATH), conn)
     return conn
 
+def close_thread_db_connection() -> None:
+    """
+    Closes the calling thread's database connection, if it has one.
+
+    Worker threads call this when their task ends, so their connections are not
+    left open until exit or handed to a later thread that reuses the same id.
+    """
+    with _connections_lock:
+        entry = _connections.pop(threading.get_ident(), None)
+    if entry is not None:
+        entry[1].close()
+
+def close_db_connection() -> None:
+    """Closes all open database connections."""
+    with _connections_lock:
+        entries = list(_connections.values())
+        _connections.clear()
+    for _, conn in entries:
+        conn.close()
+
+atexit.register(close_db_connection)
+
 def create_tables():
     """Creates the necessary tables in the database if they don't already exist."""
     conn = get_db_connection()
@@ -96,7 +159,6 @@ def create_tables():
     """)
 
     conn.commit()
-    conn.close()
 
 if __name__ == '__main__':
     # This allows us to initialize the database by running the script directly
@@ -118,7 +180,6 @@ def purge_old_runs(retention_days: int):
 
     if not old_runs:
         logging.info("No old forecast runs to purge.")
-        conn.close()
         return
 
     logging.info(f"Found {len(old_runs)} old run(s) to purge.")
@@ -127,7 +188,6 @@ def purge_old_runs(retention_days: int):
     cursor.executemany("DELETE FROM forecast_runs WHERE model_name = ? AND run_timestamp = ?", old_runs)
 
     conn.commit()
-    conn.close()
     logging.info(f"Successfully purged {len(old_runs)} old forecast run(s).")
 
 
@@ -150,7 +210,6 @@ def get_last_run_timestamp(latitude: float, longitude: float, model_name: str) -
         (latitude, longitude, model_name,)
     )
     result = cursor.fetchone()
-    conn.close()
 
     if result and result[0]:
         return datetime.fromtimestamp(result[0])
@@ -169,12 +228,11 @@ def load_raw_data(latitude: float, longitude: float, model_name: str, run_timest
     raw_df_long = pd.read_sql_query(raw_data_query, conn, params=(latitude, longitude, model_name, int(run_timestamp.timestamp())))
     if not raw_df_long.empty:
         raw_df_long['forecast_timestamp'] = pd.to_datetime(raw_df_long['forecast_timestamp'], unit='s')
-    conn.close()
 
     data = {}
     if not raw_df_long.empty:
-        for variable in raw_df_long['variable'].unique():
-            variable_df = raw_df_long[raw_df_long['variable'] == variable]
+        # Split by variable in one grouped pass rather than filtering the frame once per variable
+        for variable, variable_df in raw_df_long.groupby('variable', sort=False):
             pivot_df = variable_df.pivot(
                 index='forecast_timestamp',
                 columns='member',
@@ -198,12 +256,10 @@ def load_statistics(latitude: float, longitude: float, model_name: str, run_time
     stats_df_long = pd.read_sql_query(stats_query, conn, params=(latitude, longitude, model_name, int(run_timestamp.timestamp())))
     if not stats_df_long.empty:
         stats_df_long['forecast_timestamp'] = pd.to_datetime(stats_df_long['forecast_timestamp'], unit='s')
-    conn.close()
 
     statistics = {}
     if not stats_df_long.empty:
-        for variable in stats_df_long['variable'].unique():
-            variable_stats_df = stats_df_long[stats_df_long['variable'] == variable]
+        for variable, variable_stats_df in stats_df_long.groupby('variable', sort=False):
             pivot_stats_df = variable_stats_df.pivot(
                 index='forecast_timestamp',
                 columns='statistic',
@@ -218,64 +274,86 @@ def save_forecast_run(conn: sqlite3.Connection, latitude: float, longitude: floa
     """
     Saves a forecast run entry to the database.
     """
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (latitude, longitude, model_name, int(run_timestamp.timestamp()), version))
+    conn.execute(_INSERT_RUN, (latitude, longitude, model_name, int(run_timestamp.timestamp()), version))
     logging.info(f"Forecast run for {model_name} at {run_timestamp} recorded.")
 
+def _to_epoch_seconds(dates: Union[pd.Series, pd.Index]) -> np.ndarray:
+    """Converts datetimes (naive UTC or tz-aware) to integer Unix timestamps."""
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    epoch_seconds: np.ndarray = dates.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    return epoch_seconds
+
+def _stack_long_format(frames: list[tuple[str, np.ndarray, pd.DataFrame]]) -> tuple[list, list, list, list]:
+    """
+    Flattens wide DataFrames into parallel long-format columns, dropping NaN values.
+
+    Args:
+        frames: (variable, column labels, DataFrame) triples, where each DataFrame
+            has a DatetimeIndex and one column per label.
+
+    Returns:
+        Lists of variables, column labels, Unix timestamps and values.
+    """
+    variables, labels, timestamps, values = [], [], [], []
+    for variable, column_labels, df in frames:
+        n_rows, n_columns = df.shape
+        # Row-major ravel: all columns of the first timestamp, then the next timestamp, ...
+        values.append(df.to_numpy(dtype=np.float64).ravel())
+        timestamps.append(np.repeat(_to_epoch_seconds(df.index), n_columns))
+        labels.append(np.tile(np.asarray(column_labels, dtype=object), n_rows))
+        variables.append(np.full(n_rows * n_columns, variable, dtype=object))
+
+    if not values:
+        return [], [], [], []
+
+    all_values = np.concatenate(values)
+    valid = ~np.isnan(all_values)
+    return (
+        np.concatenate(variables)[valid].tolist(),
+        np.concatenate(labels)[valid].tolist(),
+        np.concatenate(timestamps)[valid].tolist(),
+        all_values[valid].tolist()
+    )
+
 def save_raw_data(conn: sqlite3.Connection, latitude: float, longitude: float, model_name: str, run_timestamp: datetime, data: dict[str, pd.DataFrame]):
     """
     Saves raw forecast data to the database.
+
+    All variables are flattened into long format with NumPy and written
+    with one executemany call.
     """
-    cursor = conn.cursor()
+    frames = []
     for variable, data_df in data.items():
-        if data_df is None:
+        if data_df is None or data_df.empty:
             continue
+        members = data_df.columns.astype(str).str.extract(r'member(\d+)', expand=False).fillna('0').to_numpy()
+        frames.append((variable, members, data_df))
 
-        melted_df = data_df.reset_index().melt(
-            id_vars=['date'],
-            var_name='member',
-            value_name='value'
-        )
-        melted_df.dropna(subset=['value'], inplace=True)
-        melted_df['member'] = melted_df['member'].str.extract(r'member(\d+)').fillna('0')
-
-        records = [
-            (latitude, longitude, model_name, int(run_timestamp.timestamp()), row['member'], variable, int(row['date'].timestamp()), row['value'])
-            for _, row in melted_df.iterrows()
-        ]
-        cursor.executemany("""
-            INSERT INTO raw_forecast_data (latitude, longitude, model_name, run_timestamp, member, variable, forecast_timestamp, value)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, records)
+    variables, members, timestamps, values = _stack_long_format(frames)
+    run_ts = int(run_timestamp.timestamp())
+    records = zip(repeat(latitude), repeat(longitude), repeat(model_name), repeat(run_ts), members, variables, timestamps, values)
+    conn.executemany(_INSERT_RAW, records)
     logging.info(f"Successfully saved raw data to the database for model {model_name}.")
 
 def save_statistics(conn: sqlite3.Connection, latitude: float, longitude: float, model_name: str, run_timestamp: datetime, statistics: dict[str, pd.DataFrame]):
     """
     Saves calculated statistics to the database.
+
+    All variables are flattened into long format with NumPy and written
+    with one executemany call.
     """
-    cursor = conn.cursor()
+    frames = []
     for variable, stats_df in statistics.items():
         if stats_df is None or stats_df.empty:
             continue
+        frames.append((variable, stats_df.columns.to_numpy(), stats_df))
 
-        melted_df = stats_df.reset_index().melt(
-            id_vars=['date'],
-            var_name='statistic',
-            value_name='value'
-        )
-        melted_df.dropna(subset=['value'], inplace=True)
-
-        records = [
-            (latitude, longitude, model_name, int(run_timestamp.timestamp()), variable, row['statistic'], int(row['date'].timestamp()), row['value'])
-            for _, row in melted_df.iterrows()
-        ]
-        if not records:
-            continue
-
-        cursor.executemany("""
-            INSERT INTO statistical_forecasts (latitude, longitude, model_name, run_timestamp, variable, statistic, forecast_timestamp, value)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, records)
+    variables, statistic_names, timestamps, values = _stack_long_format(frames)
+    run_ts = int(run_timestamp.timestamp())
+    records = zip(repeat(latitude), repeat(longitude), repeat(model_name), repeat(run_ts), variables, statistic_names, timestamps, values)
+    conn.executemany(_INSERT_STATS, records)
     logging.info(f"Successfully saved statistics to the database for model {model_name}.")
 
 def save_ensemble_run(conn: sqlite3.Connection, latitude: float, longitude: float, creation_timestamp: datetime, model_runs_info: str, version: str) -> Optional[int]:
@@ -1,4 +1,6 @@
 from typing import List
+from functools import reduce
+import numpy as np
 import pandas as pd
 import os
 import logging
@@ -75,9 +77,18 @@ class Ensemble:
         if not all_models_stats_dfs:
             return pd.DataFrame()
 
-        # Concatenate all models' statistics and calculate the mean
-        combined_stats = pd.concat(all_models_stats_dfs)
-        ensemble_stats = combined_stats.groupby(combined_stats.index).mean()
+        # Align all models on the same timestamps and columns and average across models.
+        # Every timestamp is its own group, so a masked mean over a stacked array replaces groupby.
+        index = reduce(lambda left, right: left.union(right), (df.index for df in all_models_stats_dfs)).sort_values()
+        columns = reduce(lambda left, right: left.union(right, sort=False), (df.columns for df in all_models_stats_dfs))
+        stacked = np.stack([df.reindex(index=index, columns=columns).to_numpy(dtype=np.float64) for df in all_models_stats_dfs])
+
+        present = ~np.isnan(stacked)
+        model_counts = present.sum(axis=0)
+        totals = np.where(present, stacked, 0.0).sum(axis=0)
+        means = np.divide(totals, model_counts, out=np.full(totals.shape, np.nan), where=model_counts > 0)
+
+        ensemble_stats = pd.DataFrame(means, index=index, columns=columns, copy=False)
         return ensemble_stats
 
     def to_csv(self, output_dir: str, config: dict):
@@ -144,8 +155,6 @@ class Ensemble:
         except Exception as e:
             conn.rollback()
             logging.error(f"Error saving ensemble statistics to the database: {e}")
-        finally:
-            conn.close()
 
     def plot_statistics(self, output_dir: str = 'output', config: dict = {}) -> None:
         """
@@ -1,17 +1,19 @@
 import pandas as pd
 import numpy as np
 
-def format_statistics_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def format_statistics_dataframe(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     """
     Applies specific rounding and formatting rules to a statistics DataFrame.
 
     Args:
         df: The DataFrame to format.
+        copy: Whether to format a copy of df. Pass False when df is a
+            temporary frame owned by the caller to format it in place.
 
     Returns:
         The formatted DataFrame.
     """
-    formatted_df = df.copy()
+    formatted_df = df.copy() if copy else df
     for col in formatted_df.columns:
         if pd.api.types.is_numeric_dtype(formatted_df[col]):
             if col.startswith('cloud_cover'):
@@ -3,10 +3,14 @@ import yaml
 import os
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from .weather_model import WeatherModel
 from .ensemble import Ensemble
 from . import database
 
+# Number of weather models downloaded and processed at the same time
+MAX_PARALLEL_MODELS = 4
+
 def setup_logging(config: Dict[str, Any]) -> None:
     """Set up logging based on the configuration."""
     logging_config = config.get('logging', {})
@@ -30,6 +34,18 @@ def setup_logging(config: Dict[str, Any]) -> None:
         handlers=handlers
     )
 
+def create_weather_model(model_name: str, config: Dict[str, Any]) -> WeatherModel:
+    """
+    Create a weather model instance from a worker thread.
+
+    The worker's database connection is closed once the model is built, so it
+    is not left open after the thread pool shuts down.
+    """
+    try:
+        return WeatherModel(model_name, config, config['location']['latitude'], config['location']['longitude'])
+    finally:
+        database.close_thread_db_connection()
+
 def load_config(config_path: str) -> Dict[str, Any]:
     """Load configuration from a YAML archive"""
     try:
@@ -75,8 +91,10 @@ def main():
 
     model_used = config.get('models_used', [])
 
-    # 4. Create weather models instances
-    all_models_attempted = [WeatherModel(name, config, config['location']['latitude'], config['location']['longitude']) for name in model_used]
+    # 4. Create weather models instances. Each model is I/O bound (HTTP and database),
+    # so they are built concurrently.
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_MODELS) as executor:
+        all_models_attempted = list(executor.map(lambda name: create_weather_model(name, config), model_used))
 
     # 5. Filter valid and complete models    
     models = [model for model in all_models_attempted if model.is_valid and model.data]
@@ -1,7 +1,9 @@
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 import requests
 import json
 import logging
+import threading
+import time
 from datetime import datetime
 
 import openmeteo_requests
@@ -12,6 +14,20 @@ import pandas as pd
 import requests_cache
 from retry_requests import retry
 
+# Parsed metadata kept in memory per URL, so repeated lookups within a run skip the HTTP request.
+# Models are built from several threads, so the cache is only accessed under its lock.
+METADATA_CACHE_TTL = 300  # seconds
+_metadata_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_metadata_cache_lock = threading.Lock()
+
+# Metadata fields delivered as Unix timestamps and converted to datetime
+_TIMESTAMP_KEYS = (
+    "data_end_time",
+    "last_run_availability_time",
+    "last_run_initialisation_time",
+    "last_run_modification_time"
+)
+
 def retrieve_model_metadata(url: str, timeout: int = 30) -> Optional[Dict[str, Any]]:
     """Retrieves model metadata from a specified Open-Meteo API URL.
 
@@ -24,27 +40,28 @@ def retrieve_model_metadata(url: str, timeout: int = 30) -> Optional[Dict[str, A
 
     Returns:
         A dictionary containing the model metadata if the request is successful,
-        otherwise None.
+        otherwise None. Successful results are reused for METADATA_CACHE_TTL seconds.
     """
-    timestamp_keys = [
-        "data_end_time",
-        "last_run_availability_time",
-        "last_run_initialisation_time",
-        "last_run_modification_time"
-    ]
+    with _metadata_cache_lock:
+        cached = _metadata_cache.get(url)
+    if cached is not None and time.monotonic() - cached[0] < METADATA_CACHE_TTL:
+        return dict(cached[1])
 
     try:
         response = requests.get(url, timeout=timeout)
         response.raise_for_status()  # Raise an exception for bad status codes
         json_metadata: Dict[str, Any] = response.json()
 
-        for key in timestamp_keys:
-            if key in json_metadata and isinstance(json_metadata[key], (int, float)):
+        for key in _TIMESTAMP_KEYS:
+            value = json_metadata.get(key)
+            if isinstance(value, (int, float)):
                 try:
-                    json_metadata[key] = datetime.fromtimestamp(json_metadata[key])
+                    json_metadata[key] = datetime.fromtimestamp(value)
                 except (ValueError, OSError):
                     pass
-        return json_metadata
+        with _metadata_cache_lock:
+            _metadata_cache[url] = (time.monotonic(), json_metadata)
+        return dict(json_metadata)
     except requests.exceptions.RequestException as e:
         logging.error(f"Error retrieving data from {url}: {e}")
         return None
@@ -52,6 +69,24 @@ def retrieve_model_metadata(url: str, timeout: int = 30) -> Optional[Dict[str, A
         logging.error(f"Error decoding JSON from {url}: {e}")
         return None
 
+# Open-Meteo client per thread, so each worker reuses one cached session and its connections
+_thread_state = threading.local()
+
+def _ensemble_client() -> openmeteo_requests.Client:
+    """Returns the calling thread's Open-Meteo API client, creating it on first use.
+
+    The client wraps a cached session with retries on error; keeping one per
+    thread avoids opening a new session, and a new handle on the HTTP cache,
+    for every variable.
+    """
+    client = getattr(_thread_state, 'client', None)
+    if client is None:
+        cache_session = requests_cache.CachedSession('.cache', expire_after = 3600)
+        retry_session = retry(cache_session, retries = 5, backoff_factor = 0.2)
+        client = openmeteo_requests.Client(session = retry_session)
+        _thread_state.client = client
+    return client
+
 def retrieve_model_variable(config: Dict[str, Any], model_name: str, var_to_retrieve: str) -> pd.DataFrame:
     """Retrieves hourly temperature data for a specific weather model from the Open-Meteo API.
 
@@ -70,10 +105,8 @@ def retrieve_model_variable(config: Dict[str, Any], model_name: str, var_to_retr
         with a 'date' column and columns for each ensemble member's temperature.
     """
 
-    # Setup the Open-Meteo API client with cache and retry on error
-    cache_session = requests_cache.CachedSession('.cache', expire_after = 3600)
-    retry_session = retry(cache_session, retries = 5, backoff_factor = 0.2)
-    openmeteo = openmeteo_requests.Client(session = retry_session)
+    # Open-Meteo API client with cache and retry on error, shared by the calling thread
+    openmeteo = _ensemble_client()
 
     if model_name == "gfs025" and var_to_retrieve == "temperature_850hPa":
         model_name = "gfs05"
@@ -1,6 +1,38 @@
+from typing import Optional, Union
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 
+# Marker for missing members in uint8 octa arrays (valid octas are 0-8)
+OCTA_MISSING = np.iinfo(np.uint8).max
+
+# Quantiles reported by calculate_percentiles and their output columns
+_PERCENTILES = (0.10, 0.50, 0.90)
+_PERCENTILE_COLUMNS = ['p10', 'median', 'p90']
+
+_OCTA_COLUMNS = [f'octa_{octa}_prob' for octa in range(9)]
+
+# Wind octants in index order: 0:N, 1:NE, 2:E, 3:SE, 4:S, 5:SW, 6:W, 7:NW
+_WIND_OCTANT_LABELS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+_WIND_COLUMNS = [f'{label}_prob' for label in _WIND_OCTANT_LABELS]
+
+# Upper edges (degrees) of the N, NE, E, SE, S, SW and W sectors; NW runs up to 337.5 and N wraps around
+WIND_SECTOR_EDGES = np.array([22.5, 67.5, 112.5, 157.5, 202.5, 247.5, 292.5, 337.5])
+
+def _row_major(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the DataFrame values as a C-contiguous float array.
+
+    Member data retrieved from the API is float32 and stays float32, halving the
+    memory the kernels stream through; any other numeric data becomes float64.
+    pandas keeps a float block column-major, so df.to_numpy() is usually a
+    Fortran-ordered view. The statistics reduce along each row (across members),
+    which is only unit-stride on a row-major array.
+    """
+    dtype = np.float32 if all(dtype == np.float32 for dtype in df.dtypes) else np.float64
+    values = df.to_numpy(dtype=dtype, copy=False)
+    return values if values.flags.c_contiguous else np.ascontiguousarray(values)
+
 def calculate_percentiles(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates the 10th percentile, median (50th percentile), and 90th percentile
@@ -14,26 +46,75 @@ def calculate_percentiles(df: pd.DataFrame) -> pd.DataFrame:
         A new DataFrame with the original index and 'p10', 'median', and 'p90' columns.
     """
     if df.empty:
-        return pd.DataFrame(columns=['p10', 'median', 'p90'])
-
-    # The data columns are the entire dataframe
-    data_columns = df
-
-    # Calculate statistics for each row
-    p10 = data_columns.apply(lambda row: row.quantile(0.10), axis=1)
-    median = data_columns.apply(lambda row: row.median(), axis=1)
-    p90 = data_columns.apply(lambda row: row.quantile(0.90), axis=1)
+        return pd.DataFrame(columns=_PERCENTILE_COLUMNS)
+
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes):
+        raise TypeError("calculate_percentiles requires numeric data columns")
+
+    # Calculate the three quantiles for all rows in a single NumPy call
+    values = _row_major(df)
+    missing = np.isnan(values)
+    if missing.any():
+        # Rows without any member stay NaN, as with pandas; fill them so nanquantile does not warn
+        all_missing = missing.all(axis=1)
+        values = np.where(all_missing[:, None], 0.0, values)
+        quantiles = np.nanquantile(values, _PERCENTILES, axis=1).T
+        quantiles[all_missing] = np.nan
+    else:
+        quantiles = _row_quantiles(values, _PERCENTILES)
 
     # Create a new DataFrame with the results
-    statistics_df = pd.DataFrame({
-        'p10': p10,
-        'median': median,
-        'p90': p90
-    }, index=df.index) # Keep the original index
+    statistics_df = pd.DataFrame(quantiles, index=df.index, columns=_PERCENTILE_COLUMNS, copy=False) # Keep the original index
 
-    statistics_df.index.name = 'date'
+    statistics_df.index = statistics_df.index.rename('date')  # Renaming in place would rename the caller's index too
     return statistics_df
 
+def _row_quantiles(values: np.ndarray, probabilities: tuple[float, ...]) -> np.ndarray:
+    """
+    Linearly interpolated quantiles of each row of a 2D array without NaNs.
+
+    Partitions the rows once around the needed order statistics instead of
+    sorting them, giving the same results as np.quantile(..., axis=1).
+
+    Args:
+        values: A 2D float array (rows x members).
+        probabilities: The quantiles to compute, between 0 and 1.
+
+    Returns:
+        An array of shape (rows, len(probabilities)).
+    """
+    lower, upper, fraction, kth = _quantile_ranks(values.shape[1], probabilities)
+
+    partitioned = np.partition(values, kth, axis=1)
+    lower_values = partitioned[:, lower]
+    # Interpolate in place in the single (rows x quantiles) block gathered at the upper ranks
+    quantiles = partitioned[:, upper]
+    quantiles -= lower_values
+    quantiles *= fraction
+    quantiles += lower_values
+    return quantiles
+
+@lru_cache(maxsize=None)
+def _quantile_ranks(n_members: int, probabilities: tuple[float, ...]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Order statistics needed to interpolate the given quantiles over n_members values.
+
+    Ensemble sizes are fixed per model (e.g. 31 for GFS), so the ranks are
+    computed once per member count and reused for every variable and run.
+
+    Returns:
+        The lower and upper ranks of each quantile, their interpolation
+        fractions, and the sorted unique ranks to partition at.
+    """
+    positions = np.asarray(probabilities) * (n_members - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n_members - 1)
+    fraction = positions - lower
+    kth = np.unique(np.concatenate((lower, upper)))
+    for ranks in (lower, upper, fraction, kth):
+        ranks.flags.writeable = False  # Shared between callers through the cache
+    return lower, upper, fraction, kth
+
 def calculate_precipitation_statistics(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates the probability of precipitation (>0) and the conditional average
@@ -49,48 +130,80 @@ def calculate_precipitation_statistics(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame(columns=['probability', 'conditional_average'])
 
-    # Calculate the probability of precipitation > 0
-    probability = (df > 0).mean(axis=1)  # The mean of booleans (True=1, False=0) equals the proportion of members forecasting precipitation.
+    values = _row_major(df)
+    wet = values > 0  # NaN members compare as False
+    wet_members = np.count_nonzero(wet, axis=1)
+
+    # Both statistics are written into one preallocated (rows x 2) block
+    statistics = np.zeros((len(values), 2))
+
+    # Calculate the probability of precipitation > 0 as the proportion of members forecasting precipitation
+    np.divide(wet_members, values.shape[1], out=statistics[:, 0])
 
-    # Calculate the conditional average of precipitation (where > 0)
-    conditional_average = df[df > 0].mean(axis=1).fillna(0)
+    # Calculate the conditional average of precipitation (where > 0), 0 when no member forecasts precipitation
+    wet_total = np.where(wet, values, 0.0).sum(axis=1)
+    np.divide(wet_total, wet_members, out=statistics[:, 1], where=wet_members > 0)
 
     # Create a new DataFrame with the results
-    statistics_df = pd.DataFrame({
-        'probability': probability,
-        'conditional_average': conditional_average
-    }, index=df.index) # Keep the original index
+    statistics_df = pd.DataFrame(statistics, index=df.index, columns=['probability', 'conditional_average'], copy=False) # Keep the original index
 
-    statistics_df.index.name = 'date'
+    statistics_df.index = statistics_df.index.rename('date')
     return statistics_df
 
-def calculate_octa_probabilities(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_octa_probabilities(df: Union[pd.DataFrame, np.ndarray], index: Optional[pd.Index] = None) -> pd.DataFrame:
     """
     Calculates the probability for each cloud cover octa (0-8) for each row.
 
     Args:
         df: The input DataFrame with a DatetimeIndex and subsequent
-            columns containing cloud cover data in octas (0-8).
+            columns containing cloud cover data in octas (0-8). A 2D uint8
+            array (rows x members) is also accepted, with missing members
+            marked as OCTA_MISSING.
+        index: The index for the result when df is an array.
 
     Returns:
         A new DataFrame with the original index and columns for the
         probability of each octa ('octa_0_prob', 'octa_1_prob', etc.).
     """
+    if isinstance(df, np.ndarray):
+        return _calculate_octa_probabilities_array(df, index)
+
     if df.empty:
         return pd.DataFrame()
 
-    # Calculate the probability for each octa value (0-8)
-    probabilities = {}
+    values = _row_major(df)
     # Count valid (non-NaN) members for each row to use as the denominator
-    valid_members = df.count(axis=1)
-    for octa in range(9):
-        # Calculate probability ignoring NaNs, handle division by zero
-        probabilities[f'octa_{octa}_prob'] = np.where(valid_members > 0, (df == octa).sum(axis=1) / valid_members, 0)
+    valid_members = np.count_nonzero(~np.isnan(values), axis=1)
+    # Values that are not an exact octa still count as members, but in no octa
+    codes = np.where(np.isin(values, np.arange(9)), values, 9).astype(np.intp)
 
-    # Create a new DataFrame with the results
-    statistics_df = pd.DataFrame(probabilities, index=df.index)
+    return _octa_probabilities_from_counts(_count_classes(codes, 9), valid_members, df.index)
+
+def _calculate_octa_probabilities_array(octas: np.ndarray, index: Optional[pd.Index]) -> pd.DataFrame:
+    """Counts octas directly on a uint8 array, skipping values above 8 as missing."""
+    if octas.size == 0:
+        return pd.DataFrame()
 
-    statistics_df.index.name = 'date'
+    counts = _count_classes(np.minimum(octas, 9).astype(np.intp), 9)
+    valid_members = counts.sum(axis=1)
+
+    return _octa_probabilities_from_counts(counts, valid_members, index)
+
+def _count_classes(codes: np.ndarray, n_classes: int) -> np.ndarray:
+    """Counts classes 0..n_classes-1 per row with a single bincount over (row, class) pairs; code n_classes is left out."""
+    n_rows = codes.shape[0]
+    bins = codes + (n_classes + 1) * np.arange(n_rows)[:, None]
+    counts = np.bincount(bins.ravel(), minlength=(n_classes + 1) * n_rows)
+    return counts.reshape(n_rows, n_classes + 1)[:, :n_classes]
+
+def _octa_probabilities_from_counts(counts: np.ndarray, valid_members: np.ndarray, index: Optional[pd.Index]) -> pd.DataFrame:
+    """Divides octa counts by the valid members of each row, giving 0 for rows without members."""
+    valid_members = valid_members[:, None]
+    probabilities = np.divide(counts, valid_members, out=np.zeros(counts.shape), where=valid_members > 0)
+
+    statistics_df = pd.DataFrame(probabilities, index=index, columns=_OCTA_COLUMNS)
+
+    statistics_df.index = statistics_df.index.rename('date')
     return statistics_df
 
 def calculate_wind_direction_probabilities(df: pd.DataFrame) -> pd.DataFrame:
@@ -108,20 +221,21 @@ def calculate_wind_direction_probabilities(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    # Map degrees to octants: 0:N, 1:NE, 2:E, 3:SE, 4:S, 5:SW, 6:W, 7:NW
-    octants_numeric = np.floor(((df + 22.5) % 360) / 45)
-    
-    octant_labels = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-    
-    probabilities = {}
+    values = _row_major(df)
+    missing = np.isnan(values)
+
+    # Map degrees to octants: 0:N, 1:NE, 2:E, 3:SE, 4:S, 5:SW, 6:W, 7:NW. Missing members get code 8.
+    octants_numeric = np.digitize(values % 360, WIND_SECTOR_EDGES) % 8
+    octants_numeric[missing] = 8
+
+    counts = _count_classes(octants_numeric, 8)
     # Count valid (non-NaN) members for each row to use as the denominator
-    valid_members = octants_numeric.count(axis=1)
-    for i, label in enumerate(octant_labels):
-        probabilities[f'{label}_prob'] = np.where(valid_members > 0, (octants_numeric == i).sum(axis=1) / valid_members, 0)
-        
-    statistics_df = pd.DataFrame(probabilities, index=df.index)
+    valid_members = np.count_nonzero(~missing, axis=1)[:, None]
+    probabilities = np.divide(counts, valid_members, out=np.zeros(counts.shape), where=valid_members > 0)
+
+    statistics_df = pd.DataFrame(probabilities, index=df.index, columns=_WIND_COLUMNS)
     
-    statistics_df.index.name = 'date'
+    statistics_df.index = statistics_df.index.rename('date')
     return statistics_df
 
 def calculate_weather_code_probabilities(df: pd.DataFrame) -> pd.DataFrame:
@@ -156,7 +270,7 @@ def calculate_weather_code_probabilities(df: pd.DataFrame) -> pd.DataFrame:
     }
 
     # Create a new DataFrame with the results
-    statistics_df = pd.DataFrame(probabilities, index=df.index)
+    statistics_df = pd.DataFrame(probabilities, index=df.index, copy=False)
 
-    statistics_df.index.name = 'date'
+    statistics_df.index = statistics_df.index.rename('date')
     return statistics_df
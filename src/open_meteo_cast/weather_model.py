@@ -1,21 +1,66 @@
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import sqlite3
 import importlib.metadata
 from .database import get_db_connection, get_last_run_timestamp, load_raw_data, load_statistics, save_forecast_run, save_raw_data, save_statistics
 from .open_meteo_api import retrieve_model_metadata, retrieve_model_variable
-from .statistics import calculate_percentiles, calculate_precipitation_statistics, calculate_octa_probabilities, calculate_wind_direction_probabilities, calculate_weather_code_probabilities
+from .statistics import OCTA_MISSING, calculate_percentiles, calculate_precipitation_statistics, calculate_octa_probabilities, calculate_wind_direction_probabilities, calculate_weather_code_probabilities
 
 from .formatting import format_statistics_dataframe
 from .plotting import generate_plots
 
+# Resolved once per process; stored with every saved forecast run
+try:
+    _PKG_VERSION = importlib.metadata.version("open-meteo-cast")
+except importlib.metadata.PackageNotFoundError:
+    _PKG_VERSION = "unknown"
+
+# Variable downloads in flight at once across all models. Every download goes through the
+# same on-disk HTTP cache, so this stays small however many models run in parallel.
+MAX_PARALLEL_REQUESTS = 4
+_request_slots = threading.BoundedSemaphore(MAX_PARALLEL_REQUESTS)
+
+def _retrieve_variable(config: Dict[str, Any], model_name: str, variable: str) -> Optional[pd.DataFrame]:
+    """Downloads one variable within a request slot; a failure only drops that variable."""
+    with _request_slots:
+        try:
+            return retrieve_model_variable(config, model_name, variable)
+        except Exception as e:
+            logging.error(f"Error retrieving {variable} for {model_name}: {e}")
+            return None
+
+def _calculate_cloud_cover_statistics(data_df: pd.DataFrame) -> pd.DataFrame:
+    """Converts cloud cover from percentage to octas and calculates their probabilities."""
+    # Octas are stored as uint8 with missing members flagged
+    octas = np.rint(data_df.to_numpy(dtype=np.float32) * np.float32(0.08))
+    octas = np.where(np.isnan(octas), OCTA_MISSING, octas).astype(np.uint8)
+    return calculate_octa_probabilities(octas, index=data_df.index)
+
+# Statistics function for each variable; any other variable gets percentiles
+_STATISTICS_BY_VARIABLE: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    'precipitation': calculate_precipitation_statistics,
+    'snowfall': calculate_precipitation_statistics,
+    'cloud_cover': _calculate_cloud_cover_statistics,
+    'wind_direction_10m': calculate_wind_direction_probabilities,
+    'weather_code': calculate_weather_code_probabilities,
+}
+
 class WeatherModel:
     """
     Represents a weather model, handling metadata checks, data loading, and processing.
+
+    Instances for different models can be created concurrently from separate
+    threads: database access goes through each thread's own connection.
     """
+    # Last run timestamp found in the database by check_if_new, reused by load_from_db
+    _last_run_from_db: Optional[datetime] = None
+
     def __init__(self, model_name: str, config: Dict, latitude: float, longitude: float):
         """
         Initializes the WeatherModel instance.
@@ -89,6 +134,7 @@ class WeatherModel:
             return False
 
         last_run_from_db = get_last_run_timestamp(self.latitude, self.longitude, self.name)
+        self._last_run_from_db = last_run_from_db
 
         if last_run_from_db is None or current_run_time > last_run_from_db:
             logging.info(f"New model run detected for {self.name}.")
@@ -102,7 +148,9 @@ class WeatherModel:
         Loads the latest available model data and statistics from the database.
         """
         logging.info(f"Loading data from database for model {self.name}...")
-        last_run_timestamp = get_last_run_timestamp(self.latitude, self.longitude, self.name)
+        last_run_timestamp = self._last_run_from_db
+        if last_run_timestamp is None:
+            last_run_timestamp = get_last_run_timestamp(self.latitude, self.longitude, self.name)
         if last_run_timestamp is None:
             logging.warning(f"No data found in database for model {self.name}.")
             return
@@ -114,12 +162,15 @@ class WeatherModel:
 
     def print_metadata(self) -> None:
         """Formats and prints dictionary with model metadata."""
-        logging.info(f"Name: {self.name}")
+        logging.info("Name: %s", self.name)
         if self.metadata is None:
             logging.error(f"Error: Metadata not available for {self.name}.")
             return
+        # Skip building one record per key when INFO is filtered out
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
         for key, value in self.metadata.items():
-            logging.info(f"{key}: {value}")
+            logging.info("%s: %s", key, value)
 
     def retrieve_data(self, config: Dict[str, Any]) -> None:
         """
@@ -134,20 +185,33 @@ class WeatherModel:
         variables = ["temperature_2m", "dew_point_2m", "pressure_msl", "temperature_850hPa", "precipitation",
                      "snowfall", "cloud_cover", "wind_speed_10m", "wind_gusts_10m", "wind_direction_10m",
                      "cape", "weather_code"]
-        for variable in variables:
-            df = retrieve_model_variable(config, self.name, variable)
+        # Variables are independent HTTP requests, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as executor:
+            results = executor.map(lambda variable: _retrieve_variable(config, self.name, variable), variables)
+            retrieved = dict(zip(variables, results))
+
+        for variable, df in retrieved.items():
             if df is not None and 'date' in df.columns:
                 df.set_index('date', inplace=True)
+            # Statistics and the ensemble align rows on the dates, so they must be sorted and unique
+            if df is not None and not (df.index.is_monotonic_increasing and df.index.is_unique):
+                logging.error(f"Error: Dates for '{variable}' of {self.name} are not unique and increasing. Discarding variable.")
+                df = None
+            if df is not None:
+                # The API delivers float32 values; keep them at that width instead of upcasting
+                df = df.astype(np.float32)
             self.data[variable] = df
 
     def print_data(self) -> None:
         """Prints the retrieved weather data."""
+        info_enabled = logging.getLogger().isEnabledFor(logging.INFO)
         for variable, data_df in self.data.items():
-            logging.info(f"Data for {variable}:")
-            if data_df is not None:
-                logging.info(data_df)
-            else:
-                logging.warning(f"No data available for {variable}.")
+            logging.info("Data for %s:", variable)
+            if data_df is None:
+                logging.warning("No data available for %s.", variable)
+            elif info_enabled:
+                # Passed as an argument so the DataFrame is only rendered if the record is emitted
+                logging.info("%s", data_df)
 
     def calculate_statistics(self) -> None:
         """
@@ -161,34 +225,54 @@ class WeatherModel:
             logging.error(f"Error: No data available to calculate statistics for {self.name}.")
             return
 
+        variables = []
         for variable, data_df in self.data.items():
             if data_df is not None:
-                if variable == 'precipitation' or variable == 'snowfall':
-                    self.statistics[variable] = calculate_precipitation_statistics(data_df)
-                elif variable == 'cloud_cover':
-                    # Convert cloud cover from percentage to octas
-                    octas_df = (data_df / 100 * 8).round().astype('Int64')
-                    self.statistics[variable] = calculate_octa_probabilities(octas_df)
-                elif variable == 'wind_direction_10m':
-                    self.statistics[variable] = calculate_wind_direction_probabilities(data_df)
-                elif variable == 'weather_code':
-                    self.statistics[variable] = calculate_weather_code_probabilities(data_df)
-                else:
-                    self.statistics[variable] = calculate_percentiles(data_df)
+                variables.append(variable)
             else:
                 logging.warning(f"Warning: No data for variable '{variable}' to calculate statistics.")
+        if not variables:
+            return
+
+        # Variables are independent and NumPy releases the GIL in the reductions, so compute them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(variables), os.cpu_count() or 1)) as executor:
+            results = executor.map(lambda variable: _STATISTICS_BY_VARIABLE.get(variable, calculate_percentiles)(self.data[variable]), variables)
+            self.statistics.update(zip(variables, results))
             
     def print_statistics(self) -> None:
         """
         Prints the calculated statistics.
         """
         if self.statistics is not None:
+            if not logging.getLogger().isEnabledFor(logging.INFO):
+                return
             for variable in self.statistics.keys():
-                logging.info(f"Statistics for {self.name} {variable}:")
-                logging.info(self.statistics[variable])
+                logging.info("Statistics for %s %s:", self.name, variable)
+                logging.info("%s", self.statistics[variable])
         else:
             logging.warning(f"No statistics available for {self.name}.")
 
+    def _combined_statistics(self, action: str) -> pd.DataFrame:
+        """
+        Combines the statistics of all variables into a single DataFrame.
+
+        Columns are prefixed with the variable name. Variables without statistics are
+        skipped with a warning mentioning the action (e.g. 'export' or 'plot').
+        """
+        stats_dfs = {}
+        for variable, stats_df in self.statistics.items():
+            if stats_df is None:
+                logging.warning(f"No statistics to {action} for variable '{variable}'.")
+                continue
+
+            stats_dfs[variable] = stats_df
+
+        # Align all variables in a single outer concat instead of joining one by one
+        all_stats_df = pd.concat(stats_dfs, axis=1, join='outer') if stats_dfs else pd.DataFrame()
+        # Prefix columns with the variable name by flattening the concat keys, avoiding a copy per variable
+        all_stats_df.columns = [f"{variable}_{column}" for variable, column in all_stats_df.columns]
+        return all_stats_df
+
     def export_statistics_to_csv(self, output_dir: str = 'output', config: Dict = {}) -> None:
         """
         Exports the calculated statistics to a single CSV file for the model.
@@ -216,20 +300,7 @@ class WeatherModel:
         timestamp_str = last_run.strftime('%Y%m%dT%H%M%S')
         timezone = config.get('location', {}).get('timezone')
 
-        all_stats_df = pd.DataFrame()
-
-        for variable, stats_df in self.statistics.items():
-            if stats_df is None:
-                logging.warning(f"No statistics to export for variable '{variable}'.")
-                continue
-
-            # Add prefix to columns to identify the variable
-            prefixed_stats_df = stats_df.add_prefix(f"{variable}_")
-            
-            if all_stats_df.empty:
-                all_stats_df = prefixed_stats_df
-            else:
-                all_stats_df = all_stats_df.join(prefixed_stats_df, how='outer')
+        all_stats_df = self._combined_statistics('export')
 
         if all_stats_df.empty:
             logging.warning(f"No statistics to export for model {self.name}.")
@@ -238,7 +309,8 @@ class WeatherModel:
         filename = f"{self.name}_{timestamp_str}.csv"
         filepath = os.path.join(output_dir, filename)
 
-        export_df = format_statistics_dataframe(all_stats_df)
+        # all_stats_df is built locally, so it can be formatted in place
+        export_df = format_statistics_dataframe(all_stats_df, copy=False)
 
         if isinstance(export_df.index, pd.DatetimeIndex) and timezone:
             export_df.index = export_df.index.tz_convert(timezone)
@@ -262,9 +334,8 @@ class WeatherModel:
 
         conn = get_db_connection()
         try:
-            version = importlib.metadata.version("open-meteo-cast")
-            conn.execute("BEGIN")
-            save_forecast_run(conn, self.latitude, self.longitude, self.name, last_run, version)
+            conn.execute("BEGIN IMMEDIATE")  # Take the write lock up front rather than upgrading mid-transaction
+            save_forecast_run(conn, self.latitude, self.longitude, self.name, last_run, _PKG_VERSION)
             save_raw_data(conn, self.latitude, self.longitude, self.name, last_run, self.data)
             save_statistics(conn, self.latitude, self.longitude, self.name, last_run, self.statistics)
             conn.commit()
@@ -274,8 +345,6 @@ class WeatherModel:
         except Exception as e:
             conn.rollback()
             logging.error(f"An error occurred while saving data to the database for {self.name}: {e}")
-        finally:
-            conn.close()
 
     def plot_statistics(self, output_dir: str = 'output', config: Dict = {}) -> None:
         """
@@ -297,19 +366,7 @@ class WeatherModel:
         timestamp_str = last_run.strftime('%Y%m%dT%H%M%S')
 
         # Combine all statistics into a single DataFrame for plotting
-        all_stats_df = pd.DataFrame()
-        for variable, stats_df in self.statistics.items():
-            if stats_df is None:
-                logging.warning(f"No statistics to plot for variable '{variable}'.")
-                continue
-
-            # Add prefix to columns to identify the variable
-            prefixed_stats_df = stats_df.add_prefix(f"{variable}_")
-            
-            if all_stats_df.empty:
-                all_stats_df = prefixed_stats_df
-            else:
-                all_stats_df = all_stats_df.join(prefixed_stats_df, how='outer')
+        all_stats_df = self._combined_statistics('plot')
 
         if all_stats_df.empty:
             logging.warning(f"No statistics to plot for model {self.name}.")
@@ -0,0 +1,25 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, mock_open
+
+
+@pytest.fixture
+def main_mocks(monkeypatch):
+    """Patch the collaborators of main.main() and expose the mocks by name."""
+    mocks = SimpleNamespace(
+        load_config=MagicMock(),
+        setup_logging=MagicMock(),
+        weather_model=MagicMock(),
+        ensemble=MagicMock(),
+        database=MagicMock(),
+        makedirs=MagicMock(),
+        open=mock_open(),
+    )
+    monkeypatch.setattr('src.open_meteo_cast.main.load_config', mocks.load_config)
+    monkeypatch.setattr('src.open_meteo_cast.main.setup_logging', mocks.setup_logging)
+    monkeypatch.setattr('src.open_meteo_cast.main.WeatherModel', mocks.weather_model)
+    monkeypatch.setattr('src.open_meteo_cast.main.Ensemble', mocks.ensemble)
+    monkeypatch.setattr('src.open_meteo_cast.main.database', mocks.database)
+    monkeypatch.setattr('src.open_meteo_cast.main.os.makedirs', mocks.makedirs)
+    monkeypatch.setattr('src.open_meteo_cast.main.open', mocks.open, raising=False)
+    return mocks
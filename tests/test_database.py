@@ -2,7 +2,7 @@ import sqlite3
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch
-import os
+import threading
 import pandas as pd
 
 from src.open_meteo_cast import database
@@ -12,19 +12,20 @@ from src.open_meteo_cast.database import (
     load_raw_data, load_statistics, save_forecast_run, save_raw_data, save_statistics
 )
 
-DB_FILE = "test_forecasts.db"
+pytestmark = pytest.mark.fs
 
 @pytest.fixture
-def test_db():
-    """Fixture to set up a test database file and patch the path."""
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-    
-    with patch.object(database, 'DB_PATH', DB_FILE):
-        yield DB_FILE
-    
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
+def test_db(tmp_path):
+    """Fixture to set up a test database file and patch the path.
+
+    The file lives in the test's own temporary directory, so tests can run in
+    parallel workers (e.g. ``pytest -n auto``) without sharing a database.
+    """
+    db_file = str(tmp_path / "test_forecasts.db")
+
+    with patch.object(database, 'DB_PATH', db_file):
+        yield db_file
+        database.close_db_connection()
 
 def test_create_tables(test_db):
     create_tables()
@@ -52,9 +53,13 @@ def test_purge_old_runs(test_db):
     old_run_time = now - timedelta(days=40)
     new_run_time = now - timedelta(days=10)
 
-    # Insert an old run and a new run
-    cursor.execute("INSERT INTO forecast_runs (model_name, run_timestamp, version) VALUES (?, ?, ?)", ("gfs", int(old_run_time.timestamp()), "0.1.0"))
-    cursor.execute("INSERT INTO forecast_runs (model_name, run_timestamp, version) VALUES (?, ?, ?)", ("gfs", int(new_run_time.timestamp()), "0.1.0"))
+    # Insert an old run with one raw value and a new run
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (0, 0, "gfs", int(old_run_time.timestamp()), "0.1.0"))
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (0, 0, "gfs", int(new_run_time.timestamp()), "0.1.0"))
+    cursor.execute(
+        "INSERT INTO raw_forecast_data (latitude, longitude, model_name, run_timestamp, member, variable, forecast_timestamp, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (0, 0, "gfs", int(old_run_time.timestamp()), "0", "temperature_2m", int(old_run_time.timestamp()), 10.0)
+    )
     
     conn.commit()
     conn.close()
@@ -69,6 +74,8 @@ def test_purge_old_runs(test_db):
     assert cursor.fetchone() is None, "Old run should be purged"
     cursor.execute("SELECT * FROM forecast_runs WHERE run_timestamp = ?", (int(new_run_time.timestamp()),))
     assert cursor.fetchone() is not None, "New run should not be purged"
+    cursor.execute("SELECT COUNT(*) FROM raw_forecast_data")
+    assert cursor.fetchone()[0] == 0, "Data of the old run should be purged with it"
     conn.close()
 
 def test_get_last_run_timestamp(test_db):
@@ -81,62 +88,103 @@ def test_get_last_run_timestamp(test_db):
     gfs_time2 = datetime.now() - timedelta(days=1)
     ecmwf_time = datetime.now() - timedelta(hours=6)
 
-    # Insert multiple runs for different models
-    cursor.execute("INSERT INTO forecast_runs (model_name, run_timestamp, version) VALUES (?, ?, ?)", ("gfs", int(gfs_time1.timestamp()), "0.1.0"))
-    cursor.execute("INSERT INTO forecast_runs (model_name, run_timestamp, version) VALUES (?, ?, ?)", ("gfs", int(gfs_time2.timestamp()), "0.1.0"))
-    cursor.execute("INSERT INTO forecast_runs (model_name, run_timestamp, version) VALUES (?, ?, ?)", ("ecmwf", int(ecmwf_time.timestamp()), "0.1.0"))
+    # Insert multiple runs for different models, plus a newer gfs run at another location
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (0, 0, "gfs", int(gfs_time1.timestamp()), "0.1.0"))
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (0, 0, "gfs", int(gfs_time2.timestamp()), "0.1.0"))
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (0, 0, "ecmwf", int(ecmwf_time.timestamp()), "0.1.0"))
+    cursor.execute("INSERT INTO forecast_runs (latitude, longitude, model_name, run_timestamp, version) VALUES (?, ?, ?, ?, ?)", (10, 10, "gfs", int(ecmwf_time.timestamp()), "0.1.0"))
     conn.commit()
     conn.close()
 
     # Test that the latest timestamp is returned for 'gfs'
-    latest_gfs_run = database.get_last_run_timestamp("gfs")
+    latest_gfs_run = database.get_last_run_timestamp(0, 0, "gfs")
     assert latest_gfs_run is not None
     assert int(latest_gfs_run.timestamp()) == int(gfs_time2.timestamp())
 
     # Test that the correct timestamp is returned for 'ecmwf'
-    latest_ecmwf_run = database.get_last_run_timestamp("ecmwf")
+    latest_ecmwf_run = database.get_last_run_timestamp(0, 0, "ecmwf")
     assert latest_ecmwf_run is not None
     assert int(latest_ecmwf_run.timestamp()) == int(ecmwf_time.timestamp())
 
     # Test that None is returned for a model with no runs
-    assert database.get_last_run_timestamp("icon") is None
+    assert database.get_last_run_timestamp(0, 0, "icon") is None
+    assert database.get_last_run_timestamp(10, 10, "ecmwf") is None
 
 def test_save_and_load_data(test_db):
     create_tables()
     model_name = "test_model"
+    latitude, longitude = -38.7, -62.3
     run_timestamp = datetime.now()
 
     # Sample Data
     raw_data = {
         'temperature': pd.DataFrame({
             'member1': [10, 20],
-            'member2': [12, 22]
-        }, index=pd.to_datetime(['2023-01-01', '2023-01-02']))
+            'member2': [12, float('nan')]
+        }, index=pd.to_datetime(['2023-01-01', '2023-01-02'])),
+        'snowfall': None,
     }
     raw_data['temperature'].index.name = 'date'
     statistics_data = {
         'temperature': pd.DataFrame({
             'p10': [10.2, 20.2],
             'median': [11, 21]
-        }, index=pd.to_datetime(['2023-01-01', '2023-01-02']))
+        }, index=pd.to_datetime(['2023-01-01', '2023-01-02'])),
+        'snowfall': None,
     }
     statistics_data['temperature'].index.name = 'date'
 
     # Save Data
     conn = sqlite3.connect(test_db)
-    save_forecast_run(conn, model_name, run_timestamp, "0.1.0")
-    save_raw_data(conn, model_name, run_timestamp, raw_data)
-    save_statistics(conn, model_name, run_timestamp, statistics_data)
+    save_forecast_run(conn, latitude, longitude, model_name, run_timestamp, "0.1.0")
+    save_raw_data(conn, latitude, longitude, model_name, run_timestamp, raw_data)
+    save_statistics(conn, latitude, longitude, model_name, run_timestamp, statistics_data)
     conn.commit()
+    stored_raw_rows = conn.execute("SELECT COUNT(*) FROM raw_forecast_data").fetchone()[0]
     conn.close()
 
     # Load Data
-    loaded_raw = load_raw_data(model_name, run_timestamp)
-    loaded_stats = load_statistics(model_name, run_timestamp)
+    loaded_raw = load_raw_data(latitude, longitude, model_name, run_timestamp)
+    loaded_stats = load_statistics(latitude, longitude, model_name, run_timestamp)
 
-    # Assertions
-    assert 'temperature' in loaded_raw
+    # Assertions: missing members and variables without data are not stored
+    assert list(loaded_raw) == ['temperature']
+    assert stored_raw_rows == 3
     pd.testing.assert_frame_equal(raw_data['temperature'].astype('float64').sort_index(axis=1), loaded_raw['temperature'].sort_index(axis=1))
 
-    assert 'temperature' in loaded_stats
+    assert list(loaded_stats) == ['temperature']
     pd.testing.assert_frame_equal(statistics_data['temperature'].astype('float64').sort_index(axis=1), loaded_stats['temperature'].sort_index(axis=1))
+
+def test_get_db_connection_is_shared(test_db):
+    conn = database.get_db_connection()
+    assert database.get_db_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    database.close_db_connection()
+    assert database.get_db_connection() is not conn
+
+def test_get_db_connection_per_thread(test_db):
+    main_conn = database.get_db_connection()
+    thread_conns = []
+    thread = threading.Thread(target=lambda: thread_conns.append(database.get_db_connection()))
+    thread.start()
+    thread.join()
+
+    assert thread_conns[0] is not main_conn
+    assert database.get_db_connection() is main_conn
+
+def test_close_thread_db_connection(test_db):
+    main_conn = database.get_db_connection()
+    thread_ids = []
+
+    def worker():
+        database.get_db_connection()
+        database.close_thread_db_connection()
+        thread_ids.append(threading.get_ident())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert thread_ids[0] not in database._connections
+    assert database.get_db_connection() is main_conn
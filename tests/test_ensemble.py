@@ -1,17 +1,15 @@
 import pandas as pd
+import pytest
 from unittest.mock import MagicMock, patch
 from src.open_meteo_cast.ensemble import Ensemble
 from src.open_meteo_cast import database
 from datetime import datetime
 
-@patch('src.open_meteo_cast.ensemble.logging')
-def test_to_html_table_with_data(mock_logging):
-    # Create a mock WeatherModel
-    mock_model = MagicMock()
-    mock_model.name = "test_model"
-    mock_model.metadata = {'last_run_availability_time': '2025-08-15T12:00:00'}
+_INDEX = pd.DatetimeIndex([pd.Timestamp('2025-08-14 12:00:00', tz='UTC'), pd.Timestamp('2025-08-14 13:00:00', tz='UTC')])
 
-    # Create a sample statistics DataFrame
+@pytest.fixture(scope="module")
+def stats_df():
+    # Sample ensemble statistics shared by the tests of this module
     data = {
         'temperature_2m_median': [10, 12],
         'precipitation_probability': [0.2, 0.5],
@@ -20,12 +18,18 @@ def test_to_html_table_with_data(mock_logging):
         'wind_direction_10m_N_prob': [0.8, 0.2],
         'wind_direction_10m_S_prob': [0.2, 0.8],
     }
-    index = pd.to_datetime(['2025-08-14 12:00:00', '2025-08-14 13:00:00'], utc=True)
-    stats_df = pd.DataFrame(data, index=index)
+    return pd.DataFrame(data, index=_INDEX)
+
+@patch('src.open_meteo_cast.ensemble.logging')
+def test_to_html_table_with_data(mock_logging, stats_df):
+    # Create a mock WeatherModel
+    mock_model = MagicMock()
+    mock_model.name = "test_model"
+    mock_model.metadata = {'last_run_availability_time': '2025-08-15T12:00:00'}
 
     # Create a mock Ensemble object
-    ensemble = Ensemble(models=[mock_model], config={'location': {'timezone': 'UTC'}, 'forecast_hours': 72})
-    ensemble.stats_df = stats_df
+    ensemble = Ensemble(models=[mock_model], config={'location': {'timezone': 'UTC'}, 'forecast_hours': 72}, latitude=-38.7, longitude=-62.3)
+    ensemble.stats_df = stats_df.copy(deep=False)
 
     # Generate the HTML table
     html = ensemble.to_html_table(config={'location': {'timezone': 'UTC'}, 'forecast_hours': 72})
@@ -43,22 +47,15 @@ def test_to_html_table_with_data(mock_logging):
 @patch('src.open_meteo_cast.ensemble.database.save_ensemble_run')
 @patch('src.open_meteo_cast.ensemble.database.save_ensemble_statistics')
 @patch('importlib.metadata.version', return_value="0.1.0")
-def test_save_to_db(mock_version, mock_save_stats, mock_save_run, mock_get_conn):
+def test_save_to_db(mock_version, mock_save_stats, mock_save_run, mock_get_conn, stats_df):
     # Create a mock WeatherModel
     mock_model = MagicMock()
     mock_model.name = "test_model"
     mock_model.metadata = {'last_run_availability_time': '2025-08-15T12:00:00'}
 
-    # Create a sample statistics DataFrame
-    data = {
-        'temperature_2m_median': [10, 12],
-    }
-    index = pd.to_datetime(['2025-08-14 12:00:00', '2025-08-14 13:00:00'], utc=True)
-    stats_df = pd.DataFrame(data, index=index)
-
     # Create a mock Ensemble object
-    ensemble = Ensemble(models=[mock_model], config={'location': {'timezone': 'UTC'}, 'forecast_hours': 72})
-    ensemble.stats_df = stats_df
+    ensemble = Ensemble(models=[mock_model], config={'location': {'timezone': 'UTC'}, 'forecast_hours': 72}, latitude=-38.7, longitude=-62.3)
+    ensemble.stats_df = stats_df[['temperature_2m_median']]
 
     # Call save_to_db
     ensemble.save_to_db()
@@ -70,4 +67,4 @@ def test_save_to_db(mock_version, mock_save_stats, mock_save_run, mock_get_conn)
 
     # Check the arguments passed to save_ensemble_run
     args, kwargs = mock_save_run.call_args
-    assert args[3] == "0.1.0"
+    assert args[5] == "0.1.0"
@@ -1,83 +1,99 @@
-from unittest.mock import patch, MagicMock, mock_open, call
-from src.open_meteo_cast.main import main
-
-@patch('src.open_meteo_cast.main.setup_logging')
-@patch('src.open_meteo_cast.main.database.purge_old_runs')
-@patch('src.open_meteo_cast.main.database.create_tables')
-@patch('src.open_meteo_cast.main.WeatherModel')
-@patch('src.open_meteo_cast.main.load_config')
-@patch('src.open_meteo_cast.main.Ensemble')
-@patch('src.open_meteo_cast.main.logging')
-def test_main_no_new_runs(mock_logging, mock_ensemble, mock_load_config, mock_weather_model, mock_create_tables, mock_purge_old_runs, mock_setup_logging):
-    # Setup: One model, no new run
-    mock_load_config.return_value = {'models_used': ['gfs025'], 'database': {'retention_days': 30}, 'logging': {'console': False}}
-    mock_model_instance = MagicMock()
-    mock_model_instance.is_new = False
-    mock_model_instance.is_valid = True
-    mock_model_instance.data = {'some_data': True}
-    mock_weather_model.return_value = mock_model_instance
+import io
+import logging
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from src.open_meteo_cast.main import main, load_config
 
-    main()
+MOCK_CONFIG = {
+    'models_used': ['gfs025'],
+    'database': {'retention_days': 30},
+    'logging': {'console': False},
+    'location': {'latitude': -38.7, 'longitude': -62.3, 'timezone': 'UTC'}
+}
 
-    mock_setup_logging.assert_called_once_with(mock_load_config.return_value)
-    mock_create_tables.assert_called_once()
-    mock_purge_old_runs.assert_called_once_with(30)
-    mock_weather_model.assert_called_once_with('gfs025', mock_load_config.return_value)
-    mock_ensemble.assert_not_called()
-    mock_logging.info.assert_called_with("No new model runs")
-
-@patch('src.open_meteo_cast.main.setup_logging')
-@patch('src.open_meteo_cast.main.os.makedirs')
-@patch('src.open_meteo_cast.main.database.purge_old_runs')
-@patch('src.open_meteo_cast.main.database.create_tables')
-@patch('src.open_meteo_cast.main.WeatherModel')
-@patch('src.open_meteo_cast.main.load_config')
-@patch('src.open_meteo_cast.main.Ensemble')
-@patch('src.open_meteo_cast.main.logging')
-def test_main_one_new_run_proceeds(mock_logging, mock_ensemble, mock_load_config, mock_weather_model, mock_create_tables, mock_purge_old_runs, mock_makedirs, mock_setup_logging):
-    # Setup: One model with a new run
-    mock_load_config.return_value = {'models_used': ['gfs025'], 'database': {'retention_days': 30}, 'logging': {'console': False}}
-    mock_model_instance = MagicMock()
-    mock_model_instance.is_new = True
-    mock_model_instance.is_valid = True
-    mock_model_instance.data = {'some_data': True}
-    mock_weather_model.return_value = mock_model_instance
-    mock_ensemble.return_value.to_html_table.return_value = "<html>test table</html>"
+def _setup_model(main_mocks, is_new):
+    main_mocks.load_config.return_value = MOCK_CONFIG
+    mock_model_instance = SimpleNamespace(is_new=is_new, is_valid=True, data={'some_data': True})
+    main_mocks.weather_model.return_value = mock_model_instance
+    main_mocks.ensemble.return_value = Mock(
+        to_html_table=Mock(return_value="<html>test table</html>"),
+        to_csv=Mock(), save_to_db=Mock(), plot_statistics=Mock()
+    )
+    return mock_model_instance
 
-    main()
+@pytest.mark.parametrize("is_new,expected_logs", [
+    (False, ['No new model runs']),
+    (True, ['New models downloaded',
+            '--- Creating and exporting ensemble ---',
+            '--- Creating and exporting HTML table ---']),
+])
+def test_main_runs(main_mocks, caplog, is_new, expected_logs):
+    # Setup: One model, with or without a new run
+    mock_model_instance = _setup_model(main_mocks, is_new)
+
+    with caplog.at_level(logging.INFO):
+        main()
+
+    main_mocks.setup_logging.assert_called_once_with(MOCK_CONFIG)
+    main_mocks.database.create_tables.assert_called_once()
+    main_mocks.database.purge_old_runs.assert_called_once_with(30)
+    main_mocks.weather_model.assert_called_once_with('gfs025', MOCK_CONFIG, -38.7, -62.3)
+    main_mocks.database.close_thread_db_connection.assert_called_once()
+    if is_new:
+        main_mocks.ensemble.assert_called_once_with([mock_model_instance], MOCK_CONFIG, -38.7, -62.3)
+        main_mocks.ensemble.return_value.to_csv.assert_called_once()
+    else:
+        main_mocks.ensemble.assert_not_called()
+    messages = [record.message for record in caplog.records if record.levelno == logging.INFO]
+    assert [message for message in messages if message in expected_logs] == expected_logs
 
-    mock_setup_logging.assert_called_once_with(mock_load_config.return_value)
-    mock_create_tables.assert_called_once()
-    mock_purge_old_runs.assert_called_once_with(30)
-    mock_weather_model.assert_called_once_with('gfs025', mock_load_config.return_value)
-    mock_model_instance.export_statistics_to_csv.assert_called_once()
-    mock_ensemble.assert_called_once_with([mock_model_instance], mock_load_config.return_value)
-    mock_ensemble.return_value.to_csv.assert_called_once()
-    mock_logging.info.assert_has_calls([call('New models downloaded'),
-                                       call('--- Creating and exporting ensemble ---'),
-                                       call('--- Creating and exporting HTML table ---')])
-
-@patch('src.open_meteo_cast.main.setup_logging')
-@patch('src.open_meteo_cast.main.open', new_callable=mock_open)
-@patch('src.open_meteo_cast.main.os.path.join', return_value='output/ensemble_forecast.html')
-@patch('src.open_meteo_cast.main.Ensemble')
-@patch('src.open_meteo_cast.main.load_config')
-@patch('src.open_meteo_cast.main.WeatherModel')
-@patch('src.open_meteo_cast.main.database.create_tables')
-@patch('src.open_meteo_cast.main.database.purge_old_runs')
-def test_main_creates_html_table(mock_purge, mock_create_tables, mock_weather_model, mock_load_config, mock_ensemble, mock_path_join, mock_open_file, mock_setup_logging):
+def test_main_creates_html_table(main_mocks, monkeypatch):
     # Setup
-    mock_load_config.return_value = {'models_used': ['gfs025'], 'database': {'retention_days': 30}, 'logging': {'console': False}}
-    mock_model_instance = MagicMock()
-    mock_model_instance.is_new = True
-    mock_model_instance.is_valid = True
-    mock_model_instance.data = {'some_data': True}
-    mock_weather_model.return_value = mock_model_instance
-    mock_ensemble.return_value.to_html_table.return_value = "<html>test table</html>"
+    _setup_model(main_mocks, is_new=True)
+    sink = io.StringIO()
+    sink.close = lambda: None  # Keep the content readable after the with block
+    opened = []
+
+    def fake_open(*args, **kwargs):
+        opened.append((args, kwargs))
+        return sink
+
+    monkeypatch.setattr('src.open_meteo_cast.main.open', fake_open, raising=False)
 
     main()
 
-    mock_setup_logging.assert_called_once_with(mock_load_config.return_value)
-    mock_ensemble.return_value.to_html_table.assert_called_once()
-    mock_open_file.assert_called_once_with('output/ensemble_forecast.html', 'w', encoding='utf-8')
-    mock_open_file().write.assert_called_once_with("<html>test table</html>")
\ No newline at end of file
+    main_mocks.setup_logging.assert_called_once_with(MOCK_CONFIG)
+    main_mocks.ensemble.return_value.to_html_table.assert_called_once()
+    assert opened == [(('output/ensemble_forecast.html', 'w'), {'encoding': 'utf-8'})]
+    assert sink.getvalue() == "<html>test table</html>"
+
+def stringio_open(read_data):
+    """Return an open() replacement that yields a fresh StringIO holding read_data."""
+    return lambda *args, **kwargs: io.StringIO(read_data)
+
+@pytest.fixture(scope="session")
+def mock_yaml_content():
+    return "models_used:\n  - gfs025\nlocation:\n  latitude: -38.7\n  longitude: -62.3\n"
+
+@pytest.fixture(scope="module")
+def mock_yaml_open(mock_yaml_content):
+    return stringio_open(mock_yaml_content)
+
+def test_load_config_success(mock_yaml_open):
+    with patch('src.open_meteo_cast.main.open', mock_yaml_open, create=True):
+        config = load_config("dummy_config.yaml")
+
+    assert config == {'models_used': ['gfs025'], 'location': {'latitude': -38.7, 'longitude': -62.3}}
+
+def test_load_config_file_not_found():
+    with patch('src.open_meteo_cast.main.open', side_effect=FileNotFoundError, create=True):
+        config = load_config("missing_config.yaml")
+
+    assert config == {}
+
+def test_load_config_yaml_error():
+    with patch('src.open_meteo_cast.main.open', side_effect=stringio_open("key: [unclosed"), create=True):
+        config = load_config("broken_config.yaml")
+
+    assert config == {}
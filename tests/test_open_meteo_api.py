@@ -1,21 +1,66 @@
+import copy
+import threading
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 import pandas as pd
 import numpy as np
 
-from src.open_meteo_cast.open_meteo_api import retrieve_model_variable
+from datetime import datetime
+
+from src.open_meteo_cast import open_meteo_api
+from src.open_meteo_cast.open_meteo_api import retrieve_model_metadata, retrieve_model_variable
 from openmeteo_sdk.Variable import Variable
 
+_TS = 1678886400
+_TS_DATETIME = datetime.fromtimestamp(_TS)
+
+def stub(**kwargs):
+    """Build a lightweight object whose methods return the given fixed values."""
+    return SimpleNamespace(**{name: (lambda value=value: value) for name, value in kwargs.items()})
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    open_meteo_api._metadata_cache.clear()
+    yield
+    open_meteo_api._metadata_cache.clear()
+
+@pytest.fixture
+def patched_om(monkeypatch):
+    """Replace the Open-Meteo client, cache session and retry wrapper used by retrieve_model_variable."""
+    client = MagicMock()
+    monkeypatch.setattr(open_meteo_api.openmeteo_requests, 'Client', client)
+    monkeypatch.setattr(open_meteo_api.requests_cache, 'CachedSession', MagicMock())
+    monkeypatch.setattr(open_meteo_api, 'retry', MagicMock())
+    monkeypatch.setattr(open_meteo_api, '_thread_state', threading.local())
+    return SimpleNamespace(client=client, weather_api=client.return_value.weather_api)
+
+@pytest.fixture(scope="module")
+def om_response_skeleton():
+    """Open-Meteo response without hourly variables, shared by the parametrized cases."""
+    hourly = stub(
+        Time=_TS,
+        TimeEnd=_TS + 72 * 3600,
+        Interval=3600,
+        VariablesLength=1
+    )
+    return stub(
+        Latitude=40.7128,
+        Longitude=-74.0060,
+        Elevation=10,
+        Timezone="America/New_York",
+        TimezoneAbbreviation="EST",
+        UtcOffsetSeconds=-18000,
+        Hourly=hourly
+    )
+
 @pytest.mark.parametrize("variable,var_enum,altitude,pressure,expected_col_name", [
     ("temperature_2m", Variable.temperature, 2, None, "temperature_2m_member0"),
     ("dew_point_2m", Variable.dew_point, 2, None, "dew_point_2m_member0"),
     ("pressure_msl", Variable.pressure_msl, None, None, "pressure_msl_member0"),
     ("temperature_850hPa", Variable.temperature, None, 850, "temperature_850hPa_member0"),
 ])
-@patch('openmeteo_requests.Client')
-@patch('requests_cache.CachedSession')
-@patch('retry_requests.retry')
-def test_retrieve_model_variable_success(mock_retry, mock_cached_session, mock_openmeteo_client, variable, var_enum, altitude, pressure, expected_col_name):
+def test_retrieve_model_variable_success(patched_om, om_response_skeleton, variable, var_enum, altitude, pressure, expected_col_name):
     # Mock the configuration
     config = {
         "api": {
@@ -31,33 +76,21 @@ def test_retrieve_model_variable_success(mock_retry, mock_cached_session, mock_o
     }
     model_name = "gfs025"
 
-    # Mock the Open-Meteo API response
-    mock_response = MagicMock()
-    mock_response.Latitude.return_value = 40.7128
-    mock_response.Longitude.return_value = -74.0060
-    mock_response.Elevation.return_value = 10
-    mock_response.Timezone.return_value = "America/New_York"
-    mock_response.TimezoneAbbreviation.return_value = "EST"
-    mock_response.UtcOffsetSeconds.return_value = -18000
-
-    mock_hourly = MagicMock()
-    mock_hourly.Time.return_value = 1678886400
-    mock_hourly.TimeEnd.return_value = 1678886400 + 72 * 3600
-    mock_hourly.Interval.return_value = 3600
-
     # Mock hourly variables
-    mock_variable = MagicMock()
-    mock_variable.Variable.return_value = var_enum
-    mock_variable.Altitude.return_value = altitude
-    mock_variable.PressureLevel.return_value = pressure
-    mock_variable.EnsembleMember.return_value = 0
-    mock_variable.ValuesAsNumpy.return_value = np.array([10.0] * 72)
-
-    mock_hourly.Variables.side_effect = lambda i: [mock_variable][i]
-    mock_hourly.VariablesLength.return_value = 1
+    mock_variable = stub(
+        Variable=var_enum,
+        Altitude=altitude,
+        PressureLevel=pressure,
+        EnsembleMember=0,
+        ValuesAsNumpy=np.array([10.0] * 72)
+    )
 
-    mock_response.Hourly.return_value = mock_hourly
-    mock_openmeteo_client.return_value.weather_api.return_value = [mock_response]
+    # Mock the Open-Meteo API response, copying the shared skeleton before overriding the variables
+    mock_hourly = copy.copy(om_response_skeleton.Hourly())
+    mock_hourly.Variables = lambda i, _variables=(mock_variable,): _variables[i]
+    mock_response = copy.copy(om_response_skeleton)
+    mock_response.Hourly = lambda: mock_hourly
+    patched_om.weather_api.return_value = [mock_response]
 
     # Call the function
     df = retrieve_model_variable(config, model_name, variable)
@@ -66,7 +99,7 @@ def test_retrieve_model_variable_success(mock_retry, mock_cached_session, mock_o
     expected_model = model_name
     if model_name == "gfs025" and variable == "temperature_850hPa":
         expected_model = "gfs05"
-    mock_openmeteo_client.return_value.weather_api.assert_called_once_with(
+    patched_om.weather_api.assert_called_once_with(
         config["api"]["open-meteo"]["ensemble_url"],
         params={
             "latitude": config["location"]["latitude"],
@@ -84,10 +117,7 @@ def test_retrieve_model_variable_success(mock_retry, mock_cached_session, mock_o
     assert len(df) == 72
     np.testing.assert_array_equal(df[expected_col_name].values, np.array([10.0] * 72))
 
-@patch('openmeteo_requests.Client')
-@patch('requests_cache.CachedSession')
-@patch('retry_requests.retry')
-def test_retrieve_model_variable_empty_response(mock_retry, mock_cached_session, mock_openmeteo_client):
+def test_retrieve_model_variable_empty_response(patched_om):
     config = {
         "api": {
             "open-meteo": {
@@ -103,8 +133,53 @@ def test_retrieve_model_variable_empty_response(mock_retry, mock_cached_session,
     model_name = "gfs025"
     variable = "temperature_2m"
 
-    mock_openmeteo_client.return_value.weather_api.return_value = [] # Empty response
+    patched_om.weather_api.return_value = [] # Empty response
 
     df = retrieve_model_variable(config, model_name, variable)
 
     assert df is None # Or handle as appropriate for empty response, e.g., empty DataFrame
+
+def test_retrieve_model_variable_reuses_thread_client(patched_om):
+    config = {
+        "api": {"open-meteo": {"ensemble_url": "http://test-ensemble-api.com/v1/ensemble"}},
+        "location": {"latitude": 40.7128, "longitude": -74.0060},
+        "forecast_hours": 72
+    }
+    patched_om.weather_api.return_value = []
+
+    retrieve_model_variable(config, "gfs025", "temperature_2m")
+    retrieve_model_variable(config, "gfs025", "dew_point_2m")
+
+    # One session and client per thread, not per variable
+    open_meteo_api.requests_cache.CachedSession.assert_called_once()
+    patched_om.client.assert_called_once()
+    assert patched_om.weather_api.call_count == 2
+
+@patch('src.open_meteo_cast.open_meteo_api.requests.get')
+def test_retrieve_model_metadata(mock_get):
+    mock_get.return_value.json.return_value = {
+        "last_run_initialisation_time": _TS,
+        "temporal_resolution_seconds": 3600
+    }
+
+    metadata = retrieve_model_metadata("http://dummy-url.com/meta.json")
+
+    mock_get.assert_called_once_with("http://dummy-url.com/meta.json", timeout=30)
+    assert metadata["last_run_initialisation_time"] == _TS_DATETIME
+    assert metadata["temporal_resolution_seconds"] == 3600
+
+@patch('src.open_meteo_cast.open_meteo_api.requests.get')
+def test_retrieve_model_metadata_memory_cache(mock_get):
+    mock_get.return_value.json.return_value = {"last_run_initialisation_time": _TS}
+
+    first = retrieve_model_metadata("http://dummy-url.com/meta.json")
+    second = retrieve_model_metadata("http://dummy-url.com/meta.json")
+
+    mock_get.assert_called_once()
+    assert first == second
+    assert first is not second
+
+    # Expired entries are fetched again
+    with patch('src.open_meteo_cast.open_meteo_api.METADATA_CACHE_TTL', 0):
+        retrieve_model_metadata("http://dummy-url.com/meta.json")
+    assert mock_get.call_count == 2
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
-from src.open_meteo_cast.statistics import calculate_percentiles, calculate_precipitation_statistics, calculate_octa_probabilities, calculate_wind_direction_probabilities, calculate_weather_code_probabilities
+import numpy as np
+from src.open_meteo_cast.statistics import OCTA_MISSING, calculate_percentiles, calculate_precipitation_statistics, calculate_octa_probabilities, calculate_wind_direction_probabilities, calculate_weather_code_probabilities
 
 def test_calculate_percentiles_basic():
     data = {
@@ -10,7 +11,7 @@ def test_calculate_percentiles_basic():
         'member4': [13, 23],
         'member5': [14, 24]
     }
-    index = pd.to_datetime(['2023-01-01', '2023-01-02'])
+    index = pd.date_range('2023-01-01', periods=2, freq='D')
     df = pd.DataFrame(data, index=index)
     
     stats_df = calculate_percentiles(df)
@@ -21,8 +22,8 @@ def test_calculate_percentiles_basic():
     assert 'p90' in stats_df.columns
     
     assert len(stats_df) == 2
-    assert stats_df.index[0] == pd.to_datetime('2023-01-01')
-    assert stats_df.index[1] == pd.to_datetime('2023-01-02')
+    assert stats_df.index[0] == pd.Timestamp('2023-01-01')
+    assert stats_df.index[1] == pd.Timestamp('2023-01-02')
 
     # For row 0: [10, 11, 12, 13, 14]
     # p10: 10.4
@@ -46,7 +47,7 @@ def test_calculate_precipitation_statistics_nan_to_zero():
         'member2': [0, -1, 12],
         'member3': [0, 0, 11]
     }
-    index = pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03'])
+    index = pd.date_range('2023-01-01', periods=3, freq='D')
     df = pd.DataFrame(data, index=index)
 
     stats_df = calculate_precipitation_statistics(df)
@@ -73,7 +74,7 @@ def test_calculate_percentiles_single_data_column():
     data = {
         'member1': [10]
     }
-    index = pd.to_datetime(['2023-01-01'])
+    index = pd.date_range('2023-01-01', periods=1, freq='D')
     df = pd.DataFrame(data, index=index)
     stats_df = calculate_percentiles(df)
     assert stats_df['p10'].iloc[0] == pytest.approx(10.0)
@@ -85,11 +86,50 @@ def test_calculate_percentiles_non_numeric_data_columns():
         'member1': [10],
         'member2': ['a']
     }
-    index = pd.to_datetime(['2023-01-01'])
+    index = pd.date_range('2023-01-01', periods=1, freq='D')
     df = pd.DataFrame(data, index=index)
     with pytest.raises(TypeError):
         calculate_percentiles(df)
 
+def test_calculate_percentiles_matches_numpy_quantile():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2023-01-01', periods=24, freq='h')
+    df = pd.DataFrame(rng.normal(size=(24, 31)), index=index)
+
+    stats_df = calculate_percentiles(df)
+
+    expected = np.quantile(df.to_numpy(), [0.10, 0.50, 0.90], axis=1)
+    np.testing.assert_allclose(stats_df[['p10', 'median', 'p90']].to_numpy().T, expected)
+
+def test_calculate_percentiles_float32_members():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2023-01-01', periods=24, freq='h')
+    df = pd.DataFrame(rng.normal(20, 5, size=(24, 31)), index=index)
+
+    stats_64 = calculate_percentiles(df)
+    stats_32 = calculate_percentiles(df.astype('float32'))
+
+    np.testing.assert_allclose(stats_32.to_numpy(), stats_64.to_numpy(), rtol=1e-5)
+
+def test_calculate_percentiles_missing_members():
+    data = {
+        'member1': [10.0, np.nan, np.nan],
+        'member2': [12.0, 30.0, np.nan],
+        'member3': [14.0, 32.0, np.nan]
+    }
+    index = pd.date_range('2023-01-01', periods=3, freq='D')
+    df = pd.DataFrame(data, index=index)
+    original = df.copy()
+
+    stats_df = calculate_percentiles(df)
+
+    # Missing members are skipped, rows without members stay NaN
+    assert stats_df['median'].iloc[0] == pytest.approx(12.0)
+    assert stats_df['p10'].iloc[1] == pytest.approx(30.2)
+    assert stats_df['median'].iloc[1] == pytest.approx(31.0)
+    assert stats_df.iloc[2].isna().all()
+    pd.testing.assert_frame_equal(df, original)
+
 def test_calculate_octa_probabilities_basic():
     data = {
         'member1': [0, 1, 2, 3, 4, 5, 6, 7, 8],
@@ -98,7 +138,7 @@ def test_calculate_octa_probabilities_basic():
         'member4': [0, 0, 0, 0, 1, 2, 3, 4, 5],
         'member5': [0, 0, 0, 0, 0, 1, 2, 3, 4]
     }
-    index = pd.to_datetime([f'2023-01-01 0{i}:00:00' for i in range(9)])
+    index = pd.date_range('2023-01-01', periods=9, freq='h')
     df = pd.DataFrame(data, index=index)
 
     stats_df = calculate_octa_probabilities(df)
@@ -133,7 +173,7 @@ def test_calculate_octa_probabilities_single_data_column():
     data = {
         'member1': [3]
     }
-    index = pd.to_datetime(['2023-01-01'])
+    index = pd.date_range('2023-01-01', periods=1, freq='D')
     df = pd.DataFrame(data, index=index)
     stats_df = calculate_octa_probabilities(df)
     assert stats_df['octa_3_prob'].iloc[0] == pytest.approx(1.0)
@@ -149,7 +189,7 @@ def test_calculate_wind_direction_probabilities_basic():
         'member4': [22.5, 67.5, 112.5, 157.5, 202.5, 247.5, 292.5, 337.5],
         'member5': [337.5, 22.5, 67.5, 112.5, 157.5, 202.5, 247.5, 292.5]
     }
-    index = pd.to_datetime([f'2023-01-01 0{i}:00:00' for i in range(8)])
+    index = pd.date_range('2023-01-01', periods=8, freq='h')
     df = pd.DataFrame(data, index=index)
 
     stats_df = calculate_wind_direction_probabilities(df)
@@ -178,7 +218,7 @@ def test_calculate_wind_direction_probabilities_single_data_column():
     data = {
         'member1': [190] # South
     }
-    index = pd.to_datetime(['2023-01-01'])
+    index = pd.date_range('2023-01-01', periods=1, freq='D')
     df = pd.DataFrame(data, index=index)
     stats_df = calculate_wind_direction_probabilities(df)
     assert stats_df['S_prob'].iloc[0] == pytest.approx(1.0)
@@ -193,7 +233,7 @@ def test_calculate_weather_code_probabilities_basic():
         'member4': [0, 95, 99],   # None, Storm, Severe Storm
         'member5': [1, 2, 3]      # None, None, None
     }
-    index = pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03'])
+    index = pd.date_range('2023-01-01', periods=3, freq='D')
     df = pd.DataFrame(data, index=index)
 
     stats_df = calculate_weather_code_probabilities(df)
@@ -224,3 +264,18 @@ def test_calculate_weather_code_probabilities_empty_df():
     stats_df = calculate_weather_code_probabilities(df)
     assert stats_df.empty
     assert list(stats_df.columns) == ['fog_prob', 'storm_prob', 'severe_storm_prob']
+
+def test_calculate_octa_probabilities_uint8_array():
+    octas = np.array([
+        [0, 0, 8, OCTA_MISSING],
+        [OCTA_MISSING, OCTA_MISSING, OCTA_MISSING, OCTA_MISSING]
+    ], dtype=np.uint8)
+    index = pd.date_range('2023-01-01', periods=2, freq='D')
+    stats_df = calculate_octa_probabilities(octas, index=index)
+    assert list(stats_df.index) == list(index)
+    # Missing members are excluded from the denominator
+    assert stats_df['octa_0_prob'].iloc[0] == pytest.approx(2 / 3)
+    assert stats_df['octa_8_prob'].iloc[0] == pytest.approx(1 / 3)
+    # A row with no valid members has zero probability everywhere
+    for i in range(9):
+        assert stats_df[f'octa_{i}_prob'].iloc[1] == pytest.approx(0.0)
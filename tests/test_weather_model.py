@@ -1,11 +1,14 @@
+import copy
 import pytest
+import logging
 from unittest.mock import patch
 import pandas as pd
 from datetime import datetime
 
+from src.open_meteo_cast import weather_model as wm_mod
 from src.open_meteo_cast.weather_model import WeatherModel
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_config():
     return {
         "api": {
@@ -25,7 +28,7 @@ def mock_config():
         }
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_metadata():
     return {
         "model": "gfs025",
@@ -33,84 +36,295 @@ def mock_metadata():
         "last_run_availability_time": datetime(2023, 3, 15, 12, 5, 0), # 5 minutes after init
     }
 
-@patch('src.open_meteo_cast.weather_model.logging')
-@patch('src.open_meteo_cast.weather_model.retrieve_model_metadata')
-@patch('src.open_meteo_cast.weather_model.get_last_run_timestamp')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.load_from_db')
+@pytest.fixture(scope="module")
+def base_model():
+    """A WeatherModel built once without network or database access."""
+    with patch.object(wm_mod, 'logging'), \
+         patch.object(wm_mod, 'retrieve_model_metadata', return_value=None), \
+         patch.object(wm_mod, 'get_last_run_timestamp', return_value=None):
+        return WeatherModel("gfs025", {}, 0, 0)
+
+@pytest.fixture
+def model(base_model):
+    """A shallow copy of base_model with its own data and statistics containers."""
+    model = copy.copy(base_model)
+    model.data = {}
+    model.statistics = {}
+    return model
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'retrieve_model_metadata')
+@patch.object(wm_mod, 'get_last_run_timestamp')
+@patch.object(WeatherModel, 'load_from_db')
 def test_init_not_new(mock_load_from_db, mock_get_last_run_timestamp, mock_retrieve_metadata, mock_logging, mock_config, mock_metadata):
     mock_retrieve_metadata.return_value = mock_metadata
     mock_get_last_run_timestamp.return_value = datetime(2023, 3, 16, 12, 0, 0) # Not new
-    model = WeatherModel("gfs025", mock_config)
+    model = WeatherModel("gfs025", mock_config, 0, 0)
     assert not model.is_new
     mock_load_from_db.assert_called_once()
 
-@patch('src.open_meteo_cast.weather_model.logging')
-@patch('src.open_meteo_cast.weather_model.datetime')
-@patch('src.open_meteo_cast.weather_model.retrieve_model_metadata')
-@patch('src.open_meteo_cast.weather_model.get_last_run_timestamp')
-@patch('src.open_meteo_cast.weather_model.retrieve_model_variable')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.calculate_statistics')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.save_to_db')
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'datetime')
+@patch.object(wm_mod, 'retrieve_model_metadata')
+@patch.object(wm_mod, 'get_last_run_timestamp')
+@patch.object(wm_mod, 'retrieve_model_variable')
+@patch.object(WeatherModel, 'calculate_statistics')
+@patch.object(WeatherModel, 'save_to_db')
 def test_init_new_run(mock_save_to_db, mock_calculate_statistics, mock_retrieve_model_variable, mock_get_last_run_timestamp, mock_retrieve_metadata, mock_datetime, mock_logging, mock_config, mock_metadata):
     mock_retrieve_metadata.return_value = mock_metadata
     mock_get_last_run_timestamp.return_value = datetime(2023, 3, 14, 12, 0, 0) # New
     mock_datetime.now.return_value = datetime(2023, 3, 15, 12, 15, 0) # 15 minutes after init
-    model = WeatherModel("gfs025", mock_config)
+    model = WeatherModel("gfs025", mock_config, 0, 0)
     assert model.is_new
     mock_save_to_db.assert_called_once()
 
-@patch('src.open_meteo_cast.weather_model.logging')
-@patch('src.open_meteo_cast.weather_model.retrieve_model_metadata')
-@patch('src.open_meteo_cast.weather_model.get_last_run_timestamp')
-@patch('src.open_meteo_cast.weather_model.load_raw_data')
-@patch('src.open_meteo_cast.weather_model.load_statistics')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.check_if_new', return_value=False)
-def test_load_from_db(mock_check_if_new, mock_load_statistics, mock_load_raw_data, mock_get_last_run_timestamp, mock_retrieve_metadata, mock_logging, mock_config, mock_metadata):
-    # We need to mock the __init__ to avoid calling get_db_connection there
-    with patch.object(WeatherModel, '__init__', lambda x, y, z: None):
-        model = WeatherModel("gfs025", mock_config)
-        model.name = "gfs025"
-        last_run = datetime(2023, 3, 15, 12, 0, 0)
-        mock_get_last_run_timestamp.return_value = last_run
-        raw_data = {'temp': pd.DataFrame()}
-        stats_data = {'temp_stats': pd.DataFrame()}
-        mock_load_raw_data.return_value = raw_data
-        mock_load_statistics.return_value = stats_data
-
-        model.load_from_db()
-
-        mock_load_raw_data.assert_called_with("gfs025", last_run)
-        mock_load_statistics.assert_called_with("gfs025", last_run)
-        assert model.data == raw_data
-        assert model.statistics == stats_data
-
-@patch('src.open_meteo_cast.weather_model.logging')
-@patch('src.open_meteo_cast.weather_model.datetime')
-@patch('src.open_meteo_cast.weather_model.retrieve_model_metadata')
-@patch('src.open_meteo_cast.weather_model.get_db_connection')
-@patch('src.open_meteo_cast.weather_model.save_forecast_run')
-@patch('src.open_meteo_cast.weather_model.save_raw_data')
-@patch('src.open_meteo_cast.weather_model.save_statistics')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.check_if_new', return_value=True)
-@patch('src.open_meteo_cast.weather_model.retrieve_model_variable')
-@patch('src.open_meteo_cast.weather_model.WeatherModel.calculate_statistics')
-@patch('importlib.metadata.version', return_value="0.1.0")
-def test_save_to_db(mock_version, mock_calculate_statistics, mock_retrieve_model_variable, mock_check_if_new, mock_save_statistics, mock_save_raw_data, mock_save_forecast_run, mock_get_db_connection, mock_retrieve_metadata, mock_datetime, mock_logging, mock_config, mock_metadata):
+_RUN_TIME = datetime(2023, 3, 15, 12, 0, 0)
+
+@pytest.mark.parametrize("metadata,last_run_from_db,expect_new", [
+    ({"last_run_initialisation_time": _RUN_TIME}, None, True),  # First run
+    ({"last_run_initialisation_time": _RUN_TIME}, datetime(2023, 3, 15, 6, 0, 0), True),  # Newer run
+    ({"last_run_initialisation_time": _RUN_TIME}, _RUN_TIME, False),  # Same run
+    ({"last_run_initialisation_time": _RUN_TIME}, datetime(2023, 3, 15, 18, 0, 0), False),  # Older run
+    ({"last_run_initialisation_time": None}, None, False),  # Unknown run time
+    (None, None, False),  # Metadata not available
+])
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'get_last_run_timestamp')
+def test_check_if_new(mock_get_last_run_timestamp, mock_logging, model, metadata, last_run_from_db, expect_new):
+    model.metadata = metadata
+    mock_get_last_run_timestamp.return_value = last_run_from_db
+
+    assert model.check_if_new() is expect_new
+    if metadata and metadata["last_run_initialisation_time"]:
+        mock_get_last_run_timestamp.assert_called_once_with(0, 0, "gfs025")
+        assert model._last_run_from_db == last_run_from_db
+    else:
+        mock_get_last_run_timestamp.assert_not_called()
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'get_last_run_timestamp')
+@patch.object(wm_mod, 'load_raw_data')
+@patch.object(wm_mod, 'load_statistics')
+def test_load_from_db(mock_load_statistics, mock_load_raw_data, mock_get_last_run_timestamp, mock_logging, model):
+    last_run = datetime(2023, 3, 15, 12, 0, 0)
+    mock_get_last_run_timestamp.return_value = last_run
+    raw_data = {'temp': pd.DataFrame()}
+    stats_data = {'temp_stats': pd.DataFrame()}
+    mock_load_raw_data.return_value = raw_data
+    mock_load_statistics.return_value = stats_data
+
+    model.load_from_db()
+
+    mock_load_raw_data.assert_called_with(0, 0, "gfs025", last_run)
+    mock_load_statistics.assert_called_with(0, 0, "gfs025", last_run)
+    assert model.data == raw_data
+    assert model.statistics == stats_data
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'get_db_connection')
+@patch.object(wm_mod, 'save_forecast_run')
+@patch.object(wm_mod, 'save_raw_data')
+@patch.object(wm_mod, 'save_statistics')
+@patch.object(wm_mod, '_PKG_VERSION', "0.1.0")
+def test_save_to_db(mock_save_statistics, mock_save_raw_data, mock_save_forecast_run, mock_get_db_connection, mock_logging, model, mock_metadata):
+    model.metadata = mock_metadata
+    model.data = {'temp': pd.DataFrame()}
+    model.statistics = {'temp_stats': pd.DataFrame()}
+    last_run = mock_metadata['last_run_initialisation_time']
+
+    model.save_to_db()
+
+    mock_get_db_connection.assert_called_once()
+    mock_save_forecast_run.assert_called_with(mock_get_db_connection.return_value, 0, 0, "gfs025", last_run, "0.1.0")
+    mock_save_raw_data.assert_called_with(mock_get_db_connection.return_value, 0, 0, "gfs025", last_run, model.data)
+    mock_save_statistics.assert_called_with(mock_get_db_connection.return_value, 0, 0, "gfs025", last_run, model.statistics)
+    mock_get_db_connection.return_value.commit.assert_called_once()
+
+VARIABLES = ("temperature_2m", "dew_point_2m", "pressure_msl", "temperature_850hPa", "precipitation",
+             "snowfall", "cloud_cover", "wind_speed_10m", "wind_gusts_10m", "wind_direction_10m",
+             "cape", "weather_code")
+
+@pytest.fixture(scope="module")
+def member_frames():
+    """One small API-shaped member frame per variable, built once for the module."""
+    dates = pd.DatetimeIndex(['2023-01-01', '2023-01-02'])
+    return {variable: pd.DataFrame({'date': dates, f'{variable}_member0': [1.0, 2.0]}) for variable in VARIABLES}
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'retrieve_model_variable')
+def test_retrieve_data(mock_retrieve_model_variable, mock_logging, mock_config, model, member_frames):
+    # retrieve_data sets the index in place, so each call gets its own copy
+    mock_retrieve_model_variable.side_effect = lambda config, name, variable: member_frames[variable].copy()
+
+    model.retrieve_data(mock_config)
+
+    assert mock_retrieve_model_variable.call_count == len(VARIABLES)
+    calls = mock_retrieve_model_variable.call_args_list
+    assert all(call.args[0] is mock_config for call in calls)
+    assert {call.args[1:] for call in calls} == {("gfs025", variable) for variable in VARIABLES}
+    # Results keep the declared variable order regardless of completion order
+    assert tuple(model.data) == VARIABLES
+    assert model.data["cloud_cover"].index.name == 'date'
+    assert (model.data["cloud_cover"].dtypes == 'float32').all()
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'retrieve_model_variable')
+def test_retrieve_data_variable_failure(mock_retrieve_model_variable, mock_logging, mock_config, model, member_frames):
+    def retrieve(config, name, variable):
+        if variable == "cape":
+            raise ConnectionError("boom")
+        return member_frames[variable].copy()
+    mock_retrieve_model_variable.side_effect = retrieve
+
+    model.retrieve_data(mock_config)
+
+    # Only the failed variable is dropped; the others are still retrieved
+    assert tuple(model.data) == VARIABLES
+    assert model.data["cape"] is None
+    assert all(model.data[variable] is not None for variable in VARIABLES if variable != "cape")
+    mock_logging.error.assert_called_once()
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'retrieve_model_variable')
+def test_retrieve_data_rejects_duplicate_dates(mock_retrieve_model_variable, mock_logging, mock_config, model, member_frames):
+    def retrieve(config, name, variable):
+        df = member_frames[variable].copy()
+        if variable == "pressure_msl":
+            df['date'] = df['date'].iloc[0]
+        return df
+    mock_retrieve_model_variable.side_effect = retrieve
+
+    model.retrieve_data(mock_config)
+
+    assert model.data["pressure_msl"] is None
+    assert model.data["temperature_2m"] is not None
+    mock_logging.error.assert_called_once()
+    assert "pressure_msl" in mock_logging.error.call_args.args[0]
+
+@pytest.mark.fs
+@patch.object(wm_mod, 'logging')
+def test_export_statistics_to_csv(mock_logging, mock_metadata, tmp_path, model):
+    index = pd.DatetimeIndex(['2023-03-15 12:00:00', '2023-03-15 13:00:00'], tz='UTC', name='date')
+
+    model.metadata = mock_metadata
+    model.statistics = {
+        'temperature_2m': pd.DataFrame({'p10': [10.04, 11.0], 'median': [12.0, 13.0], 'p90': [14.0, 15.0]}, index=index),
+        'precipitation': pd.DataFrame({'probability': [0.2, 0.5], 'conditional_average': [1.0, 2.0]}, index=index),
+        'snowfall': None,
+    }
+
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'UTC'}})
+
+    header, *rows = (tmp_path / "gfs025_20230315T120000.csv").read_text().splitlines()
+    assert header.split(',')[1:] == ['temperature_2m_p10', 'temperature_2m_median', 'temperature_2m_p90',
+                                     'precipitation_probability', 'precipitation_conditional_average']
+    assert len(rows) == 2
+    assert float(rows[0].split(',')[1]) == pytest.approx(10.0)
+
+@patch.object(wm_mod, 'logging')
+@patch.object(wm_mod, 'retrieve_model_metadata')
+@patch.object(wm_mod, 'get_last_run_timestamp')
+@patch.object(wm_mod, 'load_raw_data')
+@patch.object(wm_mod, 'load_statistics')
+def test_init_not_new_queries_last_run_once(mock_load_statistics, mock_load_raw_data, mock_get_last_run_timestamp, mock_retrieve_metadata, mock_logging, mock_config, mock_metadata):
     mock_retrieve_metadata.return_value = mock_metadata
-    mock_datetime.now.return_value = datetime(2023, 3, 15, 12, 15, 0) # 15 minutes after init
-    
-    # We need to mock the __init__ to avoid calling get_db_connection there
-    with patch.object(WeatherModel, '__init__', lambda x, y, z: None):
-        model = WeatherModel("gfs025", mock_config)
-        model.name = "gfs025"
-        model.metadata = mock_metadata
-        model.data = {'temp': pd.DataFrame()}
-        model.statistics = {'temp_stats': pd.DataFrame()}
-        last_run = mock_metadata['last_run_initialisation_time']
-
-        model.save_to_db()
-
-        mock_get_db_connection.assert_called_once()
-        mock_save_forecast_run.assert_called_with(mock_get_db_connection.return_value, "gfs025", last_run, "0.1.0")
-        mock_save_raw_data.assert_called_with(mock_get_db_connection.return_value, "gfs025", last_run, model.data)
-        mock_save_statistics.assert_called_with(mock_get_db_connection.return_value, "gfs025", last_run, model.statistics)
\ No newline at end of file
+    last_run = datetime(2023, 3, 15, 12, 0, 0)
+    mock_get_last_run_timestamp.return_value = last_run
+    mock_load_raw_data.return_value = {'temp': pd.DataFrame({'member0': [1.0]})}
+    mock_load_statistics.return_value = {}
+
+    model = WeatherModel("gfs025", mock_config, 0, 0)
+
+    assert model.is_valid
+    mock_get_last_run_timestamp.assert_called_once_with(0, 0, "gfs025")
+    mock_load_raw_data.assert_called_once_with(0, 0, "gfs025", last_run)
+
+@patch.object(wm_mod, 'logging')
+def test_calculate_statistics(mock_logging, model):
+    index = pd.DatetimeIndex(['2023-01-01', '2023-01-02'], name='date')
+
+    model.data = {
+        'temperature_2m': pd.DataFrame({'member1': [10.0, 20.0], 'member2': [12.0, 22.0]}, index=index),
+        'snowfall': pd.DataFrame({'member1': [0.0, 1.0], 'member2': [0.0, 3.0]}, index=index),
+        'cloud_cover': pd.DataFrame({'member1': [0.0, 100.0], 'member2': [float('nan'), 50.0]}, index=index),
+        'cape': None,
+    }
+
+    model.calculate_statistics()
+
+    assert list(model.statistics) == ['temperature_2m', 'snowfall', 'cloud_cover']
+    assert list(model.statistics['temperature_2m'].columns) == ['p10', 'median', 'p90']
+    assert model.statistics['snowfall']['conditional_average'].iloc[1] == pytest.approx(2.0)
+    assert model.statistics['cloud_cover']['octa_0_prob'].iloc[0] == pytest.approx(1.0)
+    assert model.statistics['cloud_cover']['octa_4_prob'].iloc[1] == pytest.approx(0.5)
+
+@pytest.mark.fs
+@patch.object(wm_mod, 'logging')
+def test_export_statistics_to_csv_converts_timezone(mock_logging, mock_metadata, tmp_path, model):
+    index = pd.DatetimeIndex(['2023-03-15 12:00:00', '2023-03-15 13:00:00'], tz='UTC', name='date')
+
+    model.metadata = mock_metadata
+    model.statistics = {'temperature_2m': pd.DataFrame({'median': [12.0, 13.0]}, index=index)}
+
+    (tmp_path / "utc").mkdir()
+    model.export_statistics_to_csv(str(tmp_path / "utc"), {'location': {'timezone': 'UTC'}})
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'America/Argentina/Buenos_Aires'}})
+
+    assert str(model.statistics['temperature_2m'].index.tz) == 'UTC'
+    utc_export = (tmp_path / "utc" / "gfs025_20230315T120000.csv").read_text().splitlines()
+    local_export = (tmp_path / "gfs025_20230315T120000.csv").read_text().splitlines()
+    assert utc_export[1].split(',')[0].endswith('+00:00')
+    assert local_export[1].split(',')[0].endswith('-03:00')
+
+@pytest.mark.fs
+@patch.object(wm_mod, 'logging')
+def test_export_statistics_to_csv_rebuilds_replaced_frames(mock_logging, mock_metadata, tmp_path, model):
+    index = pd.DatetimeIndex(['2023-03-15 12:00:00', '2023-03-15 13:00:00'], tz='UTC', name='date')
+
+    model.metadata = mock_metadata
+    model.statistics = {'temperature_2m': pd.DataFrame({'median': [1.0, 2.0]}, index=index)}
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'UTC'}})
+
+    model.statistics = {'temperature_2m': pd.DataFrame({'median': [99.0, 98.0]}, index=index)}
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'UTC'}})
+
+    _, *rows = (tmp_path / "gfs025_20230315T120000.csv").read_text().splitlines()
+    assert [float(row.split(',')[1]) for row in rows] == [99.0, 98.0]
+
+@pytest.mark.fs
+@patch.object(wm_mod, 'logging')
+def test_export_statistics_to_csv_reflects_in_place_changes(mock_logging, mock_metadata, tmp_path, model):
+    index = pd.DatetimeIndex(['2023-03-15 12:00:00', '2023-03-15 13:00:00'], tz='UTC', name='date')
+
+    model.metadata = mock_metadata
+    model.statistics = {'temperature_2m': pd.DataFrame({'median': [1.0, 2.0]}, index=index)}
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'UTC'}})
+
+    # Same frame object, changed in place (as the ensemble does with the index)
+    stats_df = model.statistics['temperature_2m']
+    stats_df['median'] = [99.0, 98.0]
+    stats_df.index = index + pd.Timedelta(hours=1)
+    model.export_statistics_to_csv(str(tmp_path), {'location': {'timezone': 'UTC'}})
+
+    _, *rows = (tmp_path / "gfs025_20230315T120000.csv").read_text().splitlines()
+    assert [row.split(',')[0] for row in rows] == ['2023-03-15 13:00:00+00:00', '2023-03-15 14:00:00+00:00']
+    assert [float(row.split(',')[1]) for row in rows] == [99.0, 98.0]
+
+def test_print_data_skips_frames_when_info_disabled(caplog, model):
+    model.data = {'temperature_2m': pd.DataFrame({'member0': [1.0]}), 'cape': None}
+
+    with caplog.at_level(logging.WARNING):
+        model.print_data()
+
+    assert "No data available for cape." in caplog.text
+    assert "Data for temperature_2m" not in caplog.text
+
+def test_print_data_logs_header_for_missing_variable(caplog, model):
+    model.data = {'temperature_2m': pd.DataFrame({'member0': [1.0]}), 'cape': None}
+
+    with caplog.at_level(logging.INFO):
+        model.print_data()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == "Data for temperature_2m:"
+    assert messages[2:] == ["Data for cape:", "No data available for cape."]